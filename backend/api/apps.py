@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        import api.signals  # noqa: F401
+        from django.conf import settings
+
+        if settings.WARMUP["ON_READY"]:
+            from api.warmup import warm_up
+
+            warm_up()
@@ -0,0 +1,75 @@
+import copy
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+from api import generations
+from api.cache import LRUCache
+
+_tokens = LRUCache(
+    settings.TOKEN_CACHE["MAX_SIZE"],
+    ttl=settings.TOKEN_CACHE["TTL"],
+    name="tokens",
+)
+
+
+def _fresh_copy(instance):
+    """
+    Копия модели без общих кэшей связей, чтобы запросы
+    не делили между собой изменяемое состояние
+    """
+    clone = copy.copy(instance)
+    clone._state = copy.copy(instance._state)
+    clone._state.fields_cache = {}
+    clone.__dict__.pop("_prefetched_objects_cache", None)
+    return clone
+
+
+def _group(key):
+    return f"token:{key}"
+
+
+def forget_token(key):
+    _tokens.delete(key)
+    generations.bump(_group(key))
+
+
+def forget_tokens(keys):
+    """
+    Делает устаревшими записи кэша токенов во всех процессах
+
+    Поколение токена сдвигается сразу и ещё раз после фиксации:
+    процесс, прочитавший из базы старые данные до фиксации, сохранит
+    их с поколением, которое второй сдвиг сделает устаревшим.
+    """
+    keys = list(keys)
+    for key in keys:
+        forget_token(key)
+
+    def forget_committed():
+        for key in keys:
+            forget_token(key)
+
+    transaction.on_commit(forget_committed)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кэшем токен -> пользователь внутри процесса
+
+    Вместе с записью хранится поколение токена из общего кэша,
+    прочитанное до запроса к базе. Удаление токена и изменение
+    пользователя сдвигают поколение, и остальные процессы перестают
+    использовать свои записи на следующем же запросе.
+    """
+
+    def authenticate_credentials(self, key):
+        (generation,) = generations.get_generations(_group(key))
+        cached = _tokens.get(key)
+        if cached is None or cached[2] != generation:
+            user, token = super().authenticate_credentials(key)
+            cached = (user, token, generation)
+            _tokens.set(key, cached)
+        user, token, _ = cached
+        return _fresh_copy(user), token
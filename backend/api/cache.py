@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+# Кэши с именем, счётчики которых попадают в /metrics.
+named_caches = {}
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш внутри процесса с необязательным TTL
+    """
+
+    def __init__(self, maxsize, ttl=None, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        if name is not None:
+            named_caches[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires = None
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
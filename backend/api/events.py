@@ -0,0 +1,189 @@
+import asyncio
+import secrets
+import threading
+from collections import defaultdict
+
+from django.db import close_old_connections
+from django.db.models import Max
+
+from api.generations import get_cache
+from recipes.constants import (
+    EVENT_LOOKBACK,
+    EVENT_QUEUE_SIZE,
+    EVENT_TICKET_TTL
+)
+from recipes.models import Recipe
+from user.models import Follow
+
+TICKET_PREFIX = "event_ticket:"
+
+
+def issue_ticket(user_id):
+    """
+    Выдаёт одноразовый билет на подключение к потоку событий
+
+    Билет хранится в общем кэше ответов, поэтому его принимает
+    процесс потока событий, а не только выдавший его веб-процесс.
+    """
+    ticket = secrets.token_urlsafe(24)
+    get_cache().set(TICKET_PREFIX + ticket, user_id, EVENT_TICKET_TTL)
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """Возвращает id пользователя по билету и гасит билет."""
+    cache = get_cache()
+    user_id = cache.get(TICKET_PREFIX + ticket)
+    if user_id is not None:
+        cache.delete(TICKET_PREFIX + ticket)
+    return user_id
+
+
+class Subscription:
+    """
+    Подписка одного соединения на события пользователя
+    """
+
+    def __init__(self, bus, user_id, loop):
+        self.bus = bus
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+    def push(self, event):
+        """Кладёт событие в очередь, вытесняя самое старое при переполнении."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    Локальная шина соединений потока событий одного процесса
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_user = defaultdict(set)
+
+    def subscribe(self, user_id, loop=None):
+        subscription = Subscription(
+            self, user_id, loop or asyncio.get_running_loop()
+        )
+        with self._lock:
+            self._by_user[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            items = self._by_user.get(subscription.user_id)
+            if items is None:
+                return
+            items.discard(subscription)
+            if not items:
+                del self._by_user[subscription.user_id]
+
+    def user_ids(self):
+        with self._lock:
+            return set(self._by_user)
+
+    def publish(self, user_ids, event):
+        """
+        Рассылает событие соединениям пользователей user_ids.
+
+        Может вызываться из любого потока: событие передаётся в цикл
+        событий каждого соединения через call_soon_threadsafe.
+        """
+        with self._lock:
+            subscriptions = [
+                subscription
+                for user_id in user_ids
+                for subscription in self._by_user.get(user_id, ())
+            ]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.push, event
+                )
+            except RuntimeError:
+                # Цикл событий уже закрыт, соединение отписывается само.
+                pass
+        return len(subscriptions)
+
+    def connections_count(self):
+        with self._lock:
+            return sum(len(items) for items in self._by_user.values())
+
+
+class RecipeFeed:
+    """
+    Новые рецепты из базы для подписчиков, подключённых к процессу
+
+    Рецепты создают другие процессы (веб, обработчик задач), поэтому
+    процесс потока событий сам опрашивает таблицу рецептов: один запрос
+    за период на процесс, а не на соединение. Транзакции фиксируются
+    не в порядке id, поэтому каждый опрос заново просматривает
+    последние EVENT_LOOKBACK id и пропускает уже разосланные.
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.cursor = None
+        self.sent = set()
+
+    def reset(self):
+        self.cursor = None
+        self.sent = set()
+
+    def poll(self):
+        """Рассылает события о рецептах, появившихся после прошлого опроса."""
+        close_old_connections()
+        if self.cursor is None:
+            self.cursor = Recipe.objects.aggregate(Max("id"))["id__max"] or 0
+            # Уже существующие рецепты окна не считаются новыми.
+            self.sent = set(Recipe.objects.filter(
+                id__gt=self.cursor - EVENT_LOOKBACK
+            ).values_list("id", flat=True))
+            return 0
+        recipes = [
+            row for row in Recipe.objects.filter(
+                id__gt=self.cursor - EVENT_LOOKBACK
+            ).order_by("id").values_list("id", "name", "author_id", "pub_date")
+            if row[0] not in self.sent
+        ]
+        if not recipes:
+            return 0
+        self.cursor = max(self.cursor, recipes[-1][0])
+        self.sent.update(row[0] for row in recipes)
+        self.sent = {
+            recipe_id for recipe_id in self.sent
+            if recipe_id > self.cursor - EVENT_LOOKBACK
+        }
+        user_ids = self.bus.user_ids()
+        if not user_ids:
+            return 0
+        followers = defaultdict(list)
+        for author_id, user_id in Follow.objects.filter(
+            author_id__in={row[2] for row in recipes}, user_id__in=user_ids
+        ).values_list("author_id", "user_id"):
+            followers[author_id].append(user_id)
+        delivered = 0
+        for recipe_id, name, author_id, pub_date in recipes:
+            if author_id in followers:
+                delivered += self.bus.publish(followers[author_id], {
+                    "id": recipe_id,
+                    "name": name,
+                    "author": author_id,
+                    "pub_date": pub_date.isoformat(),
+                })
+        return delivered
+
+
+bus = EventBus()
+feed = RecipeFeed(bus)
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+RECIPES = "recipes"
+TAGS = "tags"
+INGREDIENTS = "ingredients"
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE["ALIAS"]]
+
+
+def _key(group):
+    return f"generation:{group}"
+
+
+def get_generations(*groups):
+    """
+    Возвращает текущие поколения групп данных
+
+    Отсутствующее поколение инициализируется временем в миллисекундах,
+    чтобы после очистки кэша номера не совпали со старыми.
+    """
+    cache = get_cache()
+    keys = [_key(group) for group in groups]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            values[key] = cache.get(key)
+    return tuple(values[key] for key in keys)
+
+
+def bump(*groups):
+    """Увеличивает поколения групп, делая устаревшими связанные данные."""
+    cache = get_cache()
+    for group in groups:
+        try:
+            cache.incr(_key(group))
+        except ValueError:
+            cache.add(_key(group), int(time.time() * 1000), timeout=None)
@@ -0,0 +1,145 @@
+import posixpath
+import uuid
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from api import generations
+from api.recipe.shopping_list import render_shopping_list, result_key
+from jobs.registry import enqueue, enqueue_many, job
+from recipes.trending import recompute_trending
+from user.stats import reconcile_author_stats
+
+# Поля, которые могут ссылаться на файл: пока ссылка есть, файл не удаляется.
+FILE_REFERENCES = (
+    ("recipes.Recipe", "image"),
+    ("user.Users", "avatar"),
+)
+SAVE_OPTIONS = {
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 85, "method": 6},
+}
+
+
+def schedule_file_deletion(name):
+    """
+    Удаляет файл хранилища в фоне с задержкой
+
+    Задержка даёт истечь кэшам ответов и токенов, которые ещё
+    могут ссылаться на старое имя файла.
+    """
+    if name:
+        enqueue(
+            "media.delete_file",
+            {"name": name},
+            key=f"delete:{name}",
+            delay=settings.JOBS["DELETE_DELAY"],
+        )
+
+
+def schedule_image_optimization(instance, field):
+    schedule_images_optimization([instance], field)
+
+
+def schedule_images_optimization(instances, field):
+    items = []
+    for instance in instances:
+        name = getattr(instance, field).name
+        if name:
+            items.append((
+                {
+                    "model": instance._meta.label,
+                    "pk": instance.pk,
+                    "field": field,
+                    "name": name,
+                },
+                f"optimize:{name}",
+            ))
+    if items:
+        enqueue_many("media.optimize_image", items)
+
+
+@job("media.delete_file")
+def delete_file(name):
+    for model, field in FILE_REFERENCES:
+        if apps.get_model(model).objects.filter(**{field: name}).exists():
+            return
+    default_storage.delete(name)
+
+
+@job("media.optimize_image")
+def optimize_image(model, pk, field, name):
+    """
+    Пережимает загруженное изображение и подменяет его в записи
+
+    Слишком большие изображения уменьшаются до
+    JOBS["IMAGE_MAX_SIDE"], метаданные отбрасываются. Результат
+    сохраняется под новым именем, так как старое отдаётся с
+    неизменяемым кэшем; запись обновляется, только если в ней всё ещё
+    старое имя.
+    """
+    if not default_storage.exists(name):
+        return
+    with default_storage.open(name) as file:
+        original = file.read()
+    image = Image.open(BytesIO(original))
+    image_format = image.format
+    if image_format not in SAVE_OPTIONS:
+        return
+    image = ImageOps.exif_transpose(image)
+    max_side = settings.JOBS["IMAGE_MAX_SIDE"]
+    image.thumbnail((max_side, max_side))
+    buffer = BytesIO()
+    image.save(buffer, image_format, **SAVE_OPTIONS[image_format])
+    if buffer.tell() >= len(original):
+        return
+    directory, filename = posixpath.split(name)
+    extension = posixpath.splitext(filename)[1]
+    new_name = default_storage.save(
+        posixpath.join(directory, f"{uuid.uuid4()}{extension}"),
+        ContentFile(buffer.getvalue()),
+    )
+    updated = apps.get_model(model).objects.filter(
+        pk=pk, **{field: name}
+    ).update(**{field: new_name})
+    if not updated:
+        default_storage.delete(new_name)
+        return
+    generations.bump(generations.RECIPES)
+    schedule_file_deletion(name)
+
+
+@job(
+    "recipes.recompute_trending",
+    every=settings.TRENDING["RECOMPUTE_INTERVAL"],
+)
+def recompute_trending_scores():
+    recompute_trending()
+
+
+@job("recipes.render_shopping_list")
+def render_shopping_list_file(user_id, token):
+    """
+    Собирает список покупок и кладёт его в общий кэш ответов
+
+    Пустая строка означает пустую корзину. Результат хранится
+    JOBS["RESULT_TTL"] секунд и отдаётся по токену из запроса.
+    """
+    generations.get_cache().set(
+        result_key(user_id, token),
+        render_shopping_list(user_id) or "",
+        settings.JOBS["RESULT_TTL"],
+    )
+
+
+@job(
+    "users.reconcile_author_stats",
+    every=settings.JOBS["RECONCILE_INTERVAL"],
+)
+def reconcile_stats():
+    reconcile_author_stats()
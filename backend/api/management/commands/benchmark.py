@@ -0,0 +1,96 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment
+)
+
+from benchmarks import runner
+
+BASELINE = settings.BASE_DIR / "benchmarks" / "baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержки, число запросов и память горячих эндпоинтов "
+        "на тестовой базе и сравнивает с базовой линией"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--only", nargs="*", help="Запустить только эти сценарии"
+        )
+        parser.add_argument("--baseline", default=str(BASELINE))
+        parser.add_argument(
+            "--tolerance", type=float, default=0.5,
+            help="Допустимый рост времени и памяти относительно базовой линии",
+        )
+        parser.add_argument(
+            "--save-baseline", action="store_true",
+            help="Сохранить результаты как новую базовую линию",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            results = runner.run(
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                only=options["only"],
+                dataset={
+                    "users": options["users"],
+                    "recipes": options["recipes"],
+                    "seed": options["seed"],
+                },
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.print_table(results)
+
+        if options["save_baseline"]:
+            runner.save_baseline(options["baseline"], results)
+            self.stdout.write(
+                f"Базовая линия сохранена в {options['baseline']}"
+            )
+            return
+        try:
+            baseline = runner.load_baseline(options["baseline"])
+        except FileNotFoundError:
+            self.stdout.write("Базовая линия не найдена, сравнение пропущено")
+            return
+        regressions = runner.compare(results, baseline, options["tolerance"])
+        if regressions:
+            raise CommandError(
+                "Обнаружены регрессии:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("Регрессий нет"))
+
+    def print_table(self, results):
+        header = (
+            f"{'scenario':<26}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>9}{'alloc KB':>10}"
+        )
+        self.stdout.write(header)
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<26}{result['p50_ms']:>10.2f}"
+                f"{result['p90_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['queries']:>9}{result['alloc_peak_kb']:>10.1f}"
+            )
@@ -0,0 +1,99 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment
+)
+
+from benchmarks import plans
+from recipes.models import ShoppingCart
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Снимает планы выполнения горячих запросов API на текущей базе "
+        "и отмечает полные просмотры таблиц, сортировки и недостающие "
+        "индексы"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Email пользователя, от имени которого выполнять запросы",
+        )
+        parser.add_argument(
+            "--analyze", action="store_true",
+            help="Выполнить запросы (EXPLAIN ANALYZE, только PostgreSQL)",
+        )
+        parser.add_argument(
+            "--only", nargs="*", help="Проверить только эти сценарии"
+        )
+        parser.add_argument(
+            "--min-rows", type=int, default=1000,
+            help="Не отмечать полные просмотры таблиц меньшего размера",
+        )
+        parser.add_argument("--output", help="Записать отчёт в файл")
+        parser.add_argument(
+            "--strict", action="store_true",
+            help="Завершиться с ошибкой, если найдены проблемы",
+        )
+
+    def get_user(self, email):
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f"Пользователь {email} не найден")
+        user_id = ShoppingCart.objects.values_list(
+            "user_id", flat=True
+        ).first()
+        user = User.objects.filter(id=user_id).first() or (
+            User.objects.order_by("id").first()
+        )
+        if user is None:
+            raise CommandError("В базе нет пользователей")
+        return user
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["user"])
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                report = plans.run(
+                    user,
+                    analyze=options["analyze"],
+                    only=options["only"],
+                    min_rows=options["min_rows"],
+                )
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+        if not report["scenarios"]:
+            raise CommandError("В базе нет рецептов")
+
+        content = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(content)
+        else:
+            self.stdout.write(content)
+
+        for scenario in report["scenarios"]:
+            for query in scenario["queries"]:
+                for flag in query["flags"]:
+                    details = " ".join(
+                        str(flag[key]) for key in ("table", "key", "detail")
+                        if flag.get(key)
+                    )
+                    self.stderr.write(
+                        f"{scenario['name']}: {flag['kind']} {details}"
+                    )
+        if options["strict"] and report["flagged"]:
+            raise CommandError(
+                f"Проблемных запросов: {report['flagged']}"
+            )
@@ -0,0 +1,95 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SETUP_CODE = (
+    "import django, importlib; django.setup(); "
+    "importlib.import_module({module!r})"
+)
+
+
+def parse_importtime(output):
+    """Разбирает вывод python -X importtime в {модуль: (своё, общее)}."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время импорта модулей при запуске приложения "
+        "в отдельном процессе"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="foodgram.asgi")
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument(
+            "--packages", action="store_true",
+            help="Суммировать собственное время по пакетам верхнего уровня",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+            "WARMUP_ON_READY": "False",
+        }
+        result = subprocess.run(
+            [
+                sys.executable, "-X", "importtime", "-c",
+                SETUP_CODE.format(module=options["module"]),
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        modules = parse_importtime(result.stderr)
+        total = sum(own for own, _ in modules.values())
+        if options["packages"]:
+            packages = defaultdict(int)
+            for name, (own, _) in modules.items():
+                packages[name.partition(".")[0]] += own
+            rows = sorted(packages.items(), key=lambda row: -row[1])
+            rows = [(name, own, own) for name, own in rows]
+        else:
+            rows = sorted(
+                ((name, own, cumulative)
+                 for name, (own, cumulative) in modules.items()),
+                key=lambda row: -row[2],
+            )
+        rows = rows[:options["top"]]
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "total_ms": total / 1000,
+                "modules": [
+                    {"name": name, "self_ms": own / 1000,
+                     "cumulative_ms": cumulative / 1000}
+                    for name, own, cumulative in rows
+                ],
+            }, indent=2))
+            return
+        self.stdout.write(f"{'модуль':<50} {'своё, мс':>10} {'всего, мс':>10}")
+        for name, own, cumulative in rows:
+            self.stdout.write(
+                f"{name:<50} {own / 1000:>10.1f} {cumulative / 1000:>10.1f}"
+            )
+        self.stdout.write(
+            f"Импортировано модулей: {len(modules)}, "
+            f"всего {total / 1000:.1f} мс"
+        )
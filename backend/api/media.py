@@ -0,0 +1,161 @@
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+# Base64ImageField называет файлы uuid4, хранилище не перезаписывает
+# существующие файлы, поэтому такие имена никогда не меняют содержимое.
+VERSIONED_NAME = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном
+
+    Возвращает (начало, конец) включительно или None, если заголовок
+    не разобран и нужно отдать файл целиком. Несколько диапазонов
+    не поддерживаются и тоже дают целый файл.
+    """
+    match = BYTE_RANGE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        length = int(end)
+        if not length or not size:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+def read_range(path, start, length):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def get_cache_control(path):
+    options = settings.MEDIA_DELIVERY
+    if VERSIONED_NAME.search(posixpath.basename(path)):
+        return f"public, max-age={options['IMMUTABLE_MAX_AGE']}, immutable"
+    return f"public, max-age={options['MAX_AGE']}"
+
+
+def build_file_response(request, full_path, size, content_type, etag):
+    """Отдаёт файл из процесса, если прокси не принимает X-Accel-Redirect."""
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+        response["Content-Length"] = size
+        return response
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if "Range" in request.headers and (
+        if_range is None or if_range == etag
+    ):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+    if byte_range is None:
+        return FileResponse(open(full_path, "rb"), content_type=content_type)
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        read_range(full_path, start, end - start + 1),
+        status=206,
+        content_type=content_type,
+    )
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = end - start + 1
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Отдаёт загруженные файлы с заголовками кэширования
+
+    Django проверяет, что путь лежит в разрешённых каталогах
+    MEDIA_DELIVERY["PREFIXES"], отвечает на условные запросы по ETag
+    из размера и времени изменения файла (в том же формате, что у nginx)
+    и передаёт отдачу байтов nginx через X-Accel-Redirect, который сам
+    поддерживает диапазоны. Без MEDIA_DELIVERY["ACCEL_REDIRECT"] файл
+    отдаётся из процесса с поддержкой одного диапазона.
+    """
+    options = settings.MEDIA_DELIVERY
+    if (
+        not path.startswith(tuple(options["PREFIXES"]))
+        or posixpath.normpath(path) != path
+    ):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404
+
+    mtime = int(file_stat.st_mtime)
+    etag = quote_etag(f"{mtime:x}-{file_stat.st_size:x}")
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(mtime),
+        "Cache-Control": get_cache_control(path),
+    }
+    response = get_conditional_response(
+        request, etag=etag, last_modified=mtime
+    )
+    if response is None:
+        content_type = (
+            mimetypes.guess_type(path)[0] or "application/octet-stream"
+        )
+        if options["ACCEL_REDIRECT"]:
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = (
+                options["ACCEL_REDIRECT"] + quote(path)
+            )
+        else:
+            response = build_file_response(
+                request, full_path, file_stat.st_size, content_type, etag
+            )
+            response["Accept-Ranges"] = "bytes"
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,369 @@
+import atexit
+import bisect
+import fcntl
+import json
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_safe
+
+from api.cache import named_caches
+from api.events import bus
+from api.response_cache import counters as response_cache
+from api.singleflight import outcomes as single_flight
+from api.throttling import busy, throttled
+from foodgram.db.pool import pool_stats
+from jobs.models import Job
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+ARCHIVE = "archive.json"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRICS = {
+    "foodgram_http_requests_total": (
+        "counter", "Запросы по представлению, методу и статусу"
+    ),
+    "foodgram_http_request_duration_seconds": (
+        "histogram", "Время обработки запроса"
+    ),
+    "foodgram_http_db_duration_seconds": (
+        "histogram", "Время SQL-запросов за один запрос"
+    ),
+    "foodgram_http_db_queries_total": (
+        "counter", "SQL-запросы, выполненные при обработке запросов"
+    ),
+    "foodgram_response_cache_requests_total": (
+        "counter", "Обращения к кэшу ответов"
+    ),
+    "foodgram_single_flight_total": (
+        "counter", "Вычисления при промахах кэша по исходу"
+    ),
+    "foodgram_local_cache_requests_total": (
+        "counter", "Обращения к LRU-кэшам процессов"
+    ),
+    "foodgram_local_cache_entries": ("gauge", "Записи в LRU-кэшах процессов"),
+    "foodgram_throttled_requests_total": (
+        "counter", "Запросы, отклонённые ограничением частоты"
+    ),
+    "foodgram_busy_rejections_total": (
+        "counter", "Запросы, отклонённые ограничением параллельности"
+    ),
+    "foodgram_db_pool_events_total": (
+        "counter", "События пулов соединений"
+    ),
+    "foodgram_db_pool_connections": ("gauge", "Соединения в пулах"),
+    "foodgram_sse_connections": ("gauge", "Открытые потоки событий"),
+    "foodgram_jobs": ("gauge", "Фоновые задачи по статусам"),
+}
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def empty():
+    return {"counters": {}, "histograms": {}, "gauges": {}}
+
+
+def merge(target, data, gauges=True):
+    for key, value in data["counters"].items():
+        target["counters"][key] = target["counters"].get(key, 0) + value
+    for key, (buckets, total) in data["histograms"].items():
+        current = target["histograms"].get(key)
+        if current is None:
+            target["histograms"][key] = [list(buckets), total]
+        else:
+            for index, count in enumerate(buckets):
+                current[0][index] += count
+            current[1] += total
+    if gauges:
+        for key, value in data["gauges"].items():
+            target["gauges"][key] = target["gauges"].get(key, 0) + value
+
+
+def dump(data):
+    # Метки - кортежи пар, в JSON ключи хранятся строками.
+    return {
+        section: [[json.loads(key), value] for key, value in items.items()]
+        for section, items in data.items()
+    }
+
+
+def load(raw):
+    return {
+        section: {json.dumps(key): value for key, value in items}
+        for section, items in raw.items()
+    }
+
+
+def write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(dump(data), file)
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return load(json.load(file))
+    except (OSError, ValueError):
+        return None
+
+
+def metric_key(name, *labels):
+    return json.dumps([name, labels])
+
+
+class Collector:
+    """
+    Метрики процесса со сбросом в общий каталог
+
+    Запрос только увеличивает счётчики в памяти под блокировкой.
+    Не чаще раза в METRICS["FLUSH_INTERVAL"] секунд процесс целиком
+    перезаписывает свой файл METRICS["DIRECTORY"]/<pid>.json, а
+    /metrics складывает файлы всех рабочих процессов. Счётчики
+    завершившихся процессов переносятся в archive.json, чтобы суммы
+    не уменьшались, их gauge-метрики отбрасываются.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.data = empty()
+        self.flushed_at = time.monotonic()
+
+    def observe_request(self, view, method, status, duration, db_duration,
+                        queries):
+        if method not in METHODS:
+            method = "other"
+        labels = (("view", view), ("method", method))
+        with self._lock:
+            counters = self.data["counters"]
+            key = metric_key(
+                "foodgram_http_requests_total", *labels, ("status", status)
+            )
+            counters[key] = counters.get(key, 0) + 1
+            key = metric_key("foodgram_http_db_queries_total", *labels)
+            counters[key] = counters.get(key, 0) + queries
+            self._observe(
+                "foodgram_http_request_duration_seconds", labels, duration
+            )
+            self._observe(
+                "foodgram_http_db_duration_seconds", labels, db_duration
+            )
+
+    def _observe(self, name, labels, value):
+        key = metric_key(name, *labels)
+        histogram = self.data["histograms"].get(key)
+        if histogram is None:
+            histogram = self.data["histograms"][key] = [
+                [0] * (len(BUCKETS) + 1), 0.0
+            ]
+        histogram[0][bisect.bisect_left(BUCKETS, value)] += 1
+        histogram[1] += value
+
+    def snapshot(self):
+        data = empty()
+        with self._lock:
+            merge(data, self.data)
+        merge(data, process_metrics())
+        return data
+
+    def flush(self, force=False):
+        if not force and (
+            time.monotonic() - self.flushed_at
+            < settings.METRICS["FLUSH_INTERVAL"]
+        ):
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.flushed_at = time.monotonic()
+            directory = settings.METRICS["DIRECTORY"]
+            os.makedirs(directory, exist_ok=True)
+            write_json(
+                os.path.join(directory, f"{os.getpid()}.json"),
+                self.snapshot(),
+            )
+        except OSError:
+            pass
+        finally:
+            self._flush_lock.release()
+
+
+collector = Collector()
+atexit.register(collector.flush, True)
+
+
+def process_metrics():
+    """Счётчики, которые модули процесса ведут сами."""
+    data = empty()
+    counters, gauges = data["counters"], data["gauges"]
+    for result in ("hits", "misses"):
+        counters[metric_key(
+            "foodgram_response_cache_requests_total", ("result", result)
+        )] = response_cache[result]
+    for outcome, count in list(single_flight.items()):
+        counters[metric_key(
+            "foodgram_single_flight_total", ("outcome", outcome)
+        )] = count
+    for name, cache in list(named_caches.items()):
+        for result in ("hits", "misses"):
+            counters[metric_key(
+                "foodgram_local_cache_requests_total",
+                ("cache", name),
+                ("result", result),
+            )] = getattr(cache, result)
+        gauges[metric_key(
+            "foodgram_local_cache_entries", ("cache", name)
+        )] = len(cache)
+    for scope, count in list(throttled.items()):
+        counters[metric_key(
+            "foodgram_throttled_requests_total", ("scope", scope)
+        )] = count
+    for group, count in list(busy.items()):
+        counters[metric_key(
+            "foodgram_busy_rejections_total", ("group", group)
+        )] = count
+    for pool, stats in pool_stats().items():
+        for event in ("checkouts", "waits", "timeouts", "connects",
+                      "reconnects"):
+            counters[metric_key(
+                "foodgram_db_pool_events_total",
+                ("pool", pool),
+                ("event", event),
+            )] = stats[event]
+        for state in ("idle", "in_use"):
+            gauges[metric_key(
+                "foodgram_db_pool_connections",
+                ("pool", pool),
+                ("state", state),
+            )] = stats[state]
+    gauges[metric_key("foodgram_sse_connections")] = bus.connections_count()
+    return data
+
+
+def collect():
+    """Складывает метрики всех процессов, архивируя завершившиеся."""
+    collector.flush(force=True)
+    directory = settings.METRICS["DIRECTORY"]
+    os.makedirs(directory, exist_ok=True)
+    total = empty()
+    with open(os.path.join(directory, ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, ARCHIVE)
+        archive = read_json(archive_path) or empty()
+        archived = False
+        for name in os.listdir(directory):
+            pid = name[:-len(".json")]
+            if not name.endswith(".json") or not pid.isdigit():
+                continue
+            path = os.path.join(directory, name)
+            data = read_json(path)
+            if data is None:
+                continue
+            if pid_alive(int(pid)):
+                merge(total, data)
+                continue
+            merge(archive, data, gauges=False)
+            os.remove(path)
+            archived = True
+        if archived:
+            write_json(archive_path, archive)
+        merge(total, archive, gauges=False)
+    return total
+
+
+def job_metrics():
+    data = empty()
+    for status, _ in Job.STATUSES:
+        data["gauges"][metric_key("foodgram_jobs", ("status", status))] = 0
+    for status, count in (
+        Job.objects.order_by().values_list("status").annotate(Count("id"))
+    ):
+        data["gauges"][metric_key("foodgram_jobs", ("status", status))] = (
+            count
+        )
+    return data
+
+
+def escape(value):
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(
+        f'{name}="{escape(value)}"' for name, value in pairs
+    ) + "}"
+
+
+def render(data):
+    """Выводит метрики в текстовом формате Prometheus."""
+    series = defaultdict(list)
+    for section in ("counters", "gauges"):
+        for key, value in data[section].items():
+            name, labels = json.loads(key)
+            series[name].append((labels, value))
+    for key, histogram in data["histograms"].items():
+        name, labels = json.loads(key)
+        series[name].append((labels, histogram))
+    lines = []
+    for name in sorted(series):
+        kind, description = METRICS.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series[name], key=lambda item: item[0]):
+            if kind != "histogram":
+                lines.append(f"{name}{format_labels(labels)} {value}")
+                continue
+            buckets, total = value
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), buckets):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{format_labels(labels, [('le', bound)])} "
+                    f"{cumulative}"
+                )
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+@require_safe
+def metrics_view(request):
+    """
+    Отдаёт метрики всех рабочих процессов для Prometheus
+
+    Требуется заголовок Authorization: Bearer <METRICS["TOKEN"]>;
+    без заданного токена адрес не существует.
+    """
+    token = settings.METRICS["TOKEN"]
+    if not token:
+        raise Http404
+    if not secrets.compare_digest(
+        request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=403)
+    data = collect()
+    merge(data, job_metrics())
+    return HttpResponse(render(data), content_type=CONTENT_TYPE)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.throttling import BaseThrottle
+
+from api.metrics import collector
+from foodgram.db.routers import replica_reads
+
+logger = logging.getLogger("foodgram.performance")
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+TRANSACTION_STATEMENTS = ("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK")
+
+
+def fingerprint(sql):
+    """Приводит запросы с разной длиной списков IN к одному виду."""
+    return IN_LIST.sub("IN (...)", sql)
+
+
+class QueryRecorder:
+    """
+    Считает количество и время SQL-запросов через execute_wrapper
+    """
+
+    def __init__(self, collect_fingerprints=False):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter() if collect_fingerprints else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            if (
+                self.fingerprints is not None
+                and not sql.startswith(TRANSACTION_STATEMENTS)
+            ):
+                self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, threshold):
+        if self.fingerprints is None:
+            return []
+        return [
+            {"sql": sql, "count": count}
+            for sql, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+class MetricsMiddleware:
+    """
+    Записывает время, статус и SQL каждого запроса в метрики процесса
+
+    Метка view - имя маршрута (recipes-list, users-me и т.д.),
+    запросы вне маршрутов попадают в unmatched.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        match = request.resolver_match
+        collector.observe_request(
+            match.view_name if match else "unmatched",
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            recorder.duration,
+            recorder.count,
+        )
+        collector.flush()
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Замеряет время запроса, число и время SQL-запросов для доли
+    запросов PERFORMANCE["SAMPLE_RATE"], добавляет заголовок
+    Server-Timing и пишет структурированную строку в лог
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = settings.PERFORMANCE
+        self.sample_rate = options["SAMPLE_RATE"]
+        self.collect_duplicates = options["DUPLICATE_QUERIES"]
+        self.duplicate_threshold = options["DUPLICATE_THRESHOLD"]
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        recorder = QueryRecorder(self.collect_duplicates)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        request.performance = recorder
+        response["Server-Timing"] = (
+            f"app;dur={duration * 1000:.1f}, "
+            f'db;dur={recorder.duration * 1000:.1f};'
+            f'desc="{recorder.count} queries"'
+        )
+        self.log(request, response, duration, recorder)
+        return response
+
+    def log(self, request, response, duration, recorder):
+        match = request.resolver_match
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "db_ms": round(recorder.duration * 1000, 2),
+            "queries": recorder.count,
+        }
+        duplicates = recorder.duplicates(self.duplicate_threshold)
+        if duplicates:
+            record["duplicate_queries"] = duplicates
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Включает чтение с реплик для безопасных запросов к API
+
+    После успешного запроса на запись клиент закрепляется за основной
+    базой на REPLICA_ROUTING["STICKY_SECONDS"] секунд, чтобы сразу
+    видеть свои изменения несмотря на отставание реплик. Клиент
+    определяется по хэшу заголовка Authorization, а без него - по
+    адресу; отметки хранятся в общем кэше REPLICA_ROUTING["CACHE"].
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.ident = BaseThrottle()
+
+    def get_keys(self, request):
+        keys = []
+        authorization = request.META.get("HTTP_AUTHORIZATION")
+        if authorization:
+            digest = hashlib.sha256(authorization.encode()).hexdigest()
+            keys.append(f"sticky:{digest}")
+        keys.append(f"sticky:ip:{self.ident.get_ident(request)}")
+        return keys
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        options = settings.REPLICA_ROUTING
+        if not request.path.startswith(tuple(options["PATHS"])):
+            return self.get_response(request)
+        cache = caches[options["CACHE"]]
+        keys = self.get_keys(request)
+        if request.method in self.SAFE_METHODS:
+            if cache.get_many(keys):
+                return self.get_response(request)
+            with replica_reads():
+                return self.get_response(request)
+        response = self.get_response(request)
+        if response.status_code < 400:
+            cache.set(keys[0], True, timeout=options["STICKY_SECONDS"])
+        return response
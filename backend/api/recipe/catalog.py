@@ -0,0 +1,85 @@
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+
+from api.generations import INGREDIENTS, get_cache, get_generations
+from api.renderers import FastJSONRenderer
+from api.singleflight import coalesce
+from recipes.models import Ingredient
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+_snapshot = {"generation": None, "value": None}
+_snapshot_lock = threading.Lock()
+
+
+class Snapshot:
+    """Справочник ингредиентов в готовом JSON и в сжатом виде."""
+
+    def __init__(self, content):
+        self.version = hashlib.sha256(content).hexdigest()[:16]
+        options = settings.INGREDIENT_CATALOG
+        self.encodings = {
+            # mtime=0 делает архив одинаковым во всех процессах.
+            "gzip": gzip.compress(
+                content, options["GZIP_LEVEL"], mtime=0
+            ),
+            "identity": content,
+        }
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(
+                content, quality=options["BROTLI_QUALITY"]
+            )
+
+    def negotiate(self, accept_encoding):
+        """Выбирает самое компактное кодирование, принятое клиентом."""
+        accepted = set()
+        for part in accept_encoding.split(","):
+            coding, _, params = part.strip().partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00"):
+                accepted.add(coding.strip().lower())
+        for coding in ("br", "gzip"):
+            if coding in self.encodings and (
+                coding in accepted or "*" in accepted
+            ):
+                return coding, self.encodings[coding]
+        return "identity", self.encodings["identity"]
+
+
+def build_snapshot():
+    data = [
+        {"id": pk, "name": name, "measurement_unit": unit}
+        for pk, name, unit in Ingredient.objects.order_by("id").values_list(
+            "id", "name", "measurement_unit"
+        )
+    ]
+    return Snapshot(FastJSONRenderer().render(data))
+
+
+def get_snapshot():
+    """
+    Возвращает снимок справочника для текущего поколения INGREDIENTS
+
+    Снимок собирается один раз на процесс после каждого изменения
+    ингредиентов. Версия - хэш содержимого, поэтому все процессы
+    независимо получают одну и ту же версию и один и тот же адрес.
+    Сжимает справочник только один процесс, остальные берут готовый
+    снимок из общего кэша.
+    """
+    generation, = get_generations(INGREDIENTS)
+    if _snapshot["generation"] != generation:
+        with _snapshot_lock:
+            if _snapshot["generation"] != generation:
+                _snapshot["value"] = coalesce(
+                    f"ingredient_catalog:{generation}",
+                    build_snapshot,
+                    get_cache(),
+                    settings.RESPONSE_CACHE["TIMEOUT"],
+                )
+                _snapshot["generation"] = generation
+    return _snapshot["value"]
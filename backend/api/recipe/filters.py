@@ -1,6 +1,72 @@
+import threading
+
+from django.db.models import Count, Exists, OuterRef
 from django_filters import rest_framework as filters
 
-from recipes.models import Tags, User, Ingredient
+from api.generations import TAGS, get_generations
+from recipes.trending import ORDERING as TRENDING_ORDERING
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tags
+)
+
+RecipeTags = Recipe.tags.through
+
+_tag_ids = {"generation": None, "ids": {}}
+_tag_ids_lock = threading.Lock()
+
+
+def get_tag_slugs():
+    """
+    Возвращает {слаг: id} всех тегов по кэшу процесса
+
+    Кэш перечитывается только при смене поколения TAGS.
+    """
+    generation, = get_generations(TAGS)
+    if _tag_ids["generation"] != generation:
+        with _tag_ids_lock:
+            if _tag_ids["generation"] != generation:
+                _tag_ids["ids"] = dict(
+                    Tags.objects.values_list("slug", "id")
+                )
+                _tag_ids["generation"] = generation
+    return _tag_ids["ids"]
+
+
+def parse_tag_slugs(values):
+    """Собирает слаги из повторённых и перечисленных через запятую значений."""
+    return {slug for item in values for slug in item.split(",") if slug}
+
+
+def get_tag_ids(slugs):
+    """
+    Переводит слаги тегов в id, неизвестные слаги пропускаются
+    """
+    ids = get_tag_slugs()
+    return {ids[slug] for slug in slugs if slug in ids}
+
+
+def count_tags(queryset):
+    """
+    Считает рецепты queryset по тегам одним сгруппированным запросом
+
+    Возвращает {слаг: число} для всех тегов, включая нулевые.
+    """
+    counts = dict(
+        RecipeTags.objects.filter(
+            recipe_id__in=queryset.order_by().values("id")
+        )
+        .order_by()
+        .values_list("tags_id")
+        .annotate(Count("recipe_id"))
+    )
+    return {
+        slug: counts.get(tag_id, 0)
+        for slug, tag_id in sorted(get_tag_slugs().items())
+    }
 
 
 class RecipeFilter(filters.FilterSet):
@@ -8,28 +74,55 @@ class RecipeFilter(filters.FilterSet):
     Фильтр для рецептов
     """
 
-    author = filters.ModelChoiceFilter(
-        field_name="author_id",
-        queryset=User.objects.all(),
-    )
-    tags = filters.filters.ModelMultipleChoiceFilter(
-        queryset=Tags.objects.all(),
-        field_name="tags__slug",
-        to_field_name="slug",
+    author = filters.NumberFilter(field_name="author_id")
+    tags = filters.CharFilter(method="tags_filter")
+    tags_mode = filters.ChoiceFilter(
+        choices=(("any", "any"), ("all", "all")),
+        method="skip_filter",
     )
     is_favorited = filters.BooleanFilter(method="favorited_filter")
     is_in_shopping_cart = filters.BooleanFilter(method="shoppingcart_filter")
+    ordering = filters.ChoiceFilter(
+        choices=(("trending", "trending"),),
+        method="ordering_filter",
+    )
+    facets = filters.ChoiceFilter(
+        choices=(("tags", "tags"),),
+        method="skip_filter",
+    )
+
+    def skip_filter(self, queryset, name, value):
+        return queryset
+
+    def ordering_filter(self, queryset, name, value):
+        return queryset.order_by(*TRENDING_ORDERING)
+
+    def tags_filter(self, queryset, name, value):
+        tag_ids = get_tag_ids(parse_tag_slugs(self.data.getlist(name)))
+        if not tag_ids:
+            return queryset.none()
+        if self.data.get("tags_mode") == "all":
+            for tag_id in tag_ids:
+                queryset = queryset.filter(Exists(RecipeTags.objects.filter(
+                    recipe_id=OuterRef("pk"), tags_id=tag_id
+                )))
+            return queryset
+        return queryset.filter(id__in=RecipeTags.objects.filter(
+            tags_id__in=tag_ids
+        ).values("recipe_id"))
 
     def favorited_filter(self, queryset, name, value):
         if value is True and self.request.user.is_authenticated:
-            return queryset.filter(favorites__user_id=self.request.user.id)
+            return queryset.filter(Exists(FavoriteRecipe.objects.filter(
+                recipe_id=OuterRef("pk"), user_id=self.request.user.id
+            )))
         return queryset
 
     def shoppingcart_filter(self, queryset, name, value):
         if value is True and self.request.user.is_authenticated:
-            return queryset.filter(
-                shopping_carts__user_id=self.request.user.id
-            )
+            return queryset.filter(Exists(ShoppingCart.objects.filter(
+                recipe_id=OuterRef("pk"), user_id=self.request.user.id
+            )))
         return queryset
 
 
@@ -0,0 +1,297 @@
+import heapq
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections
+
+from api.cache import LRUCache
+from api.generations import get_cache
+from recipes.models import Recipe, RecipeIngredient
+
+VERSION_KEY = "recipe_index:version"
+
+
+def change_key(version):
+    return f"recipe_index:changes:{version}"
+
+
+def get_changes_version():
+    return get_cache().get(VERSION_KEY, 0)
+
+
+def log_changes(recipe_ids):
+    """
+    Записывает id изменённых рецептов в общий журнал и возвращает версию
+
+    Версия увеличивается через incr; если на файловом кэше два процесса
+    получили один номер, cache.add не даст перезаписать запись и второй
+    процесс возьмёт следующий номер.
+    """
+    cache = get_cache()
+    ttl = settings.RECIPE_INDEX["CHANGES_TTL"]
+    while True:
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 0, timeout=None)
+            continue
+        if cache.add(change_key(version), recipe_ids, ttl):
+            return version
+
+
+class RecipeIndex:
+    """
+    Разреженное представление рецептов в памяти процесса
+
+    Хранит множества ингредиентов и тегов каждого рецепта и обратные
+    индексы ингредиент -> рецепты и тег -> рецепты. Строится двумя
+    запросами к промежуточным таблицам. Изменения рецептов любой
+    процесс записывает в общий журнал id (log_changes), а остальные
+    перечитывают только эти рецепты. Если журнал неполон (записи
+    истекли или отставание больше MAX_CHANGES), индекс перестраивается
+    в фоновом потоке, а запросы до конца перестройки читают прежний.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self.built_at = None
+        self.version = None
+        self.rebuilding = False
+        self._similar = LRUCache(
+            settings.RECIPE_INDEX["SIMILAR_CACHE_SIZE"], name="similar"
+        )
+        self._reset()
+
+    def _reset(self):
+        self.recipe_ingredients = {}
+        self.recipe_tags = {}
+        self.ingredient_recipes = defaultdict(set)
+        self.tag_recipes = defaultdict(set)
+        self._similar.clear()
+
+    def ensure_fresh(self):
+        if self.built_at is None:
+            with self._sync_lock:
+                if self.built_at is None:
+                    self.build()
+            return self
+        version = get_changes_version()
+        if version == self.version or self.rebuilding:
+            return self
+        # Журнал применяет один поток, остальные читают прежний индекс.
+        if not self._sync_lock.acquire(blocking=False):
+            return self
+        try:
+            self.sync(version)
+        finally:
+            self._sync_lock.release()
+        return self
+
+    def sync(self, version):
+        behind = version - self.version
+        if 0 < behind <= settings.RECIPE_INDEX["MAX_CHANGES"]:
+            keys = [
+                change_key(number)
+                for number in range(self.version + 1, version + 1)
+            ]
+            changes = get_cache().get_many(keys)
+            if len(changes) == len(keys):
+                self.update_recipes({
+                    recipe_id
+                    for recipe_ids in changes.values()
+                    for recipe_id in recipe_ids
+                })
+                self.version = version
+                return
+        self.rebuilding = True
+        threading.Thread(target=self.rebuild, daemon=True).start()
+
+    def rebuild(self):
+        try:
+            self.build()
+        finally:
+            self.rebuilding = False
+            connections.close_all()
+
+    def build(self):
+        # Версия читается до чтения таблиц: изменения, записанные
+        # во время сборки, будут применены ещё раз при следующей сверке.
+        version = get_changes_version()
+        recipe_ids = list(
+            Recipe.objects.order_by().values_list("id", flat=True)
+        )
+        ingredients = {recipe_id: set() for recipe_id in recipe_ids}
+        tags = {recipe_id: set() for recipe_id in recipe_ids}
+        for recipe_id, ingredient_id in (
+            RecipeIngredient.objects.order_by()
+            .values_list("recipe_id", "ingredient_id")
+            .iterator()
+        ):
+            ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+        for recipe_id, tag_id in (
+            Recipe.tags.through.objects.order_by()
+            .values_list("recipe_id", "tags_id")
+            .iterator()
+        ):
+            tags.setdefault(recipe_id, set()).add(tag_id)
+        with self._lock:
+            self._reset()
+            for recipe_id, items in ingredients.items():
+                self._add(recipe_id, items, tags.get(recipe_id, ()))
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def _add(self, recipe_id, ingredients, tags):
+        self.recipe_ingredients[recipe_id] = frozenset(ingredients)
+        self.recipe_tags[recipe_id] = frozenset(tags)
+        for ingredient_id in ingredients:
+            self.ingredient_recipes[ingredient_id].add(recipe_id)
+        for tag_id in tags:
+            self.tag_recipes[tag_id].add(recipe_id)
+
+    def _remove(self, recipe_id):
+        for ingredient_id in self.recipe_ingredients.pop(recipe_id, ()):
+            self.ingredient_recipes[ingredient_id].discard(recipe_id)
+        for tag_id in self.recipe_tags.pop(recipe_id, ()):
+            self.tag_recipes[tag_id].discard(recipe_id)
+
+    def recipes_changed(self, recipe_ids):
+        """Записывает изменение в журнал и применяет его в этом процессе."""
+        recipe_ids = sorted(set(recipe_ids))
+        version = log_changes(recipe_ids)
+        self.update_recipes(recipe_ids)
+        with self._lock:
+            # Своя запись уже применена, если перед ней журнал был прочитан.
+            if self.version == version - 1:
+                self.version = version
+
+    def update_recipes(self, recipe_ids):
+        """Перечитывает рецепты тремя запросами, если индекс построен."""
+        if self.built_at is None:
+            return
+        recipe_ids = set(recipe_ids)
+        existing = set(
+            Recipe.objects.filter(id__in=recipe_ids)
+            .order_by()
+            .values_list("id", flat=True)
+        )
+        ingredients = {recipe_id: set() for recipe_id in existing}
+        for recipe_id, ingredient_id in (
+            RecipeIngredient.objects.filter(recipe_id__in=existing)
+            .order_by()
+            .values_list("recipe_id", "ingredient_id")
+        ):
+            ingredients[recipe_id].add(ingredient_id)
+        tags = {recipe_id: set() for recipe_id in existing}
+        for recipe_id, tag_id in (
+            Recipe.tags.through.objects.filter(recipe_id__in=existing)
+            .order_by()
+            .values_list("recipe_id", "tags_id")
+        ):
+            tags[recipe_id].add(tag_id)
+        with self._lock:
+            for recipe_id in recipe_ids:
+                self._remove(recipe_id)
+                if recipe_id in existing:
+                    self._add(
+                        recipe_id, ingredients[recipe_id], tags[recipe_id]
+                    )
+            self._similar.clear()
+
+    def ingredient_weight(self, ingredient_id):
+        """IDF-вес: частые ингредиенты вроде соли почти не влияют."""
+        total = len(self.recipe_ingredients) or 1
+        frequency = len(self.ingredient_recipes.get(ingredient_id, ())) or 1
+        return math.log(1 + total / frequency)
+
+    def similarity(self, first, second):
+        options = settings.RECIPE_INDEX
+        ingredients_a = self.recipe_ingredients.get(first, frozenset())
+        ingredients_b = self.recipe_ingredients.get(second, frozenset())
+        union = ingredients_a | ingredients_b
+        ingredient_score = 0.0
+        if union:
+            ingredient_score = sum(
+                self.ingredient_weight(item)
+                for item in ingredients_a & ingredients_b
+            ) / sum(self.ingredient_weight(item) for item in union)
+        tags_a = self.recipe_tags.get(first, frozenset())
+        tags_b = self.recipe_tags.get(second, frozenset())
+        tag_union = tags_a | tags_b
+        tag_score = len(tags_a & tags_b) / len(tag_union) if tag_union else 0
+        weight = options["INGREDIENT_WEIGHT"]
+        return weight * ingredient_score + (1 - weight) * tag_score
+
+    def similar(self, recipe_id, limit):
+        """
+        Возвращает до limit пар (id, сходство) по убыванию сходства
+
+        Кандидаты берутся из списков рецептов по общим ингредиентам;
+        слишком длинные списки (самые частые ингредиенты) пропускаются,
+        но их вес учитывается при подсчёте сходства.
+        """
+        self.ensure_fresh()
+        cached = self._similar.get(recipe_id)
+        if cached is not None and len(cached) >= limit:
+            return cached[:limit]
+        with self._lock:
+            ingredients = self.recipe_ingredients.get(recipe_id)
+            if ingredients is None:
+                return None
+            max_posting = settings.RECIPE_INDEX["MAX_POSTING"]
+            candidates = set()
+            for ingredient_id in ingredients:
+                posting = self.ingredient_recipes.get(ingredient_id, ())
+                if len(posting) <= max_posting:
+                    candidates.update(posting)
+            candidates.discard(recipe_id)
+            result = heapq.nlargest(
+                limit,
+                (
+                    (candidate, self.similarity(recipe_id, candidate))
+                    for candidate in candidates
+                ),
+                key=lambda item: (item[1], -item[0]),
+            )
+        self._similar.set(recipe_id, result)
+        return result
+
+    def pantry(self, ingredient_ids, tag_ids=None):
+        """
+        Ранжирует рецепты по покрытию набора ингредиентов пользователя
+
+        Возвращает тройки (id, недостающих, совпавших): сначала рецепты
+        с наименьшим числом недостающих ингредиентов, затем с большим
+        числом совпадений. Если заданы tag_ids, остаются рецепты
+        хотя бы с одним из этих тегов.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            matched = Counter()
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self.ingredient_recipes.get(ingredient_id, ()))
+            if tag_ids:
+                allowed = set()
+                for tag_id in tag_ids:
+                    allowed |= self.tag_recipes.get(tag_id, set())
+                matched = {
+                    recipe_id: count for recipe_id, count in matched.items()
+                    if recipe_id in allowed
+                }
+            ranked = [
+                (
+                    recipe_id,
+                    len(self.recipe_ingredients[recipe_id]) - count,
+                    count,
+                )
+                for recipe_id, count in matched.items()
+            ]
+        ranked.sort(key=lambda item: (item[1], -item[2], -item[0]))
+        return ranked
+
+
+recipe_index = RecipeIndex()
@@ -0,0 +1,121 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+
+from recipes.models import (
+    FavoriteRecipe,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart
+)
+from user.models import Follow
+
+User = get_user_model()
+
+RECIPE_FIELDS = ("id", "author_id", "name", "image", "text", "cooking_time")
+AUTHOR_FIELDS = (
+    "id", "email", "username", "first_name", "last_name", "avatar"
+)
+
+
+def file_url(name, request):
+    """Повторяет ImageField.to_representation для имени файла."""
+    if not name:
+        return None
+    url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def build_recipe_payloads(recipe_ids, request):
+    """
+    Собирает данные рецептов в формате RecipeReadSerializer
+
+    Вместо обхода сериализаторов по объектам выполняет по одному
+    запросу values() на каждую связь и раскладывает строки по словарям.
+    Порядок рецептов совпадает с порядком recipe_ids.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return []
+    unique_ids = set(recipe_ids)
+    recipes = {
+        row["id"]: row
+        for row in Recipe.objects.filter(id__in=unique_ids)
+        .order_by()
+        .values(*RECIPE_FIELDS)
+    }
+    if not recipes:
+        return []
+
+    tags = defaultdict(list)
+    for recipe_id, tag_id, name, slug in (
+        Recipe.tags.through.objects.filter(recipe_id__in=recipes)
+        .order_by("tags__name")
+        .values_list("recipe_id", "tags_id", "tags__name", "tags__slug")
+    ):
+        tags[recipe_id].append({"id": tag_id, "name": name, "slug": slug})
+
+    ingredients = defaultdict(list)
+    for recipe_id, ingredient_id, name, unit, amount in (
+        RecipeIngredient.objects.filter(recipe_id__in=recipes)
+        .values_list(
+            "recipe_id",
+            "ingredient_id",
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            "amount",
+        )
+    ):
+        ingredients[recipe_id].append({
+            "id": ingredient_id,
+            "name": name,
+            "measurement_unit": unit,
+            "amount": amount,
+        })
+
+    author_ids = {row["author_id"] for row in recipes.values()}
+    user = request.user if request else None
+    subscribed = favorited = in_cart = frozenset()
+    if user is not None and user.is_authenticated:
+        subscribed = set(
+            Follow.objects.filter(user=user, author_id__in=author_ids)
+            .values_list("author_id", flat=True)
+        )
+        favorited = set(
+            FavoriteRecipe.objects.filter(user=user, recipe_id__in=recipes)
+            .values_list("recipe_id", flat=True)
+        )
+        in_cart = set(
+            ShoppingCart.objects.filter(user=user, recipe_id__in=recipes)
+            .values_list("recipe_id", flat=True)
+        )
+
+    authors = {}
+    for row in User.objects.filter(id__in=author_ids).order_by().values(
+        *AUTHOR_FIELDS
+    ):
+        row["avatar"] = file_url(row["avatar"], request)
+        row["is_subscribed"] = row["id"] in subscribed
+        authors[row["id"]] = row
+
+    payloads = []
+    for recipe_id in recipe_ids:
+        row = recipes.get(recipe_id)
+        if row is None:
+            continue
+        payloads.append({
+            "id": recipe_id,
+            "tags": tags[recipe_id],
+            "author": authors[row["author_id"]],
+            "ingredients": ingredients[recipe_id],
+            "is_favorited": recipe_id in favorited,
+            "is_in_shopping_cart": recipe_id in in_cart,
+            "name": row["name"],
+            "image": file_url(row["image"], request),
+            "text": row["text"],
+            "cooking_time": row["cooking_time"],
+        })
+    return payloads
@@ -1,7 +1,16 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from recipes.constants import (
+    BULK_BATCH_SIZE,
+    BULK_CREATE_LIMIT,
+    MIN_AMOUNT,
+    MIN_COOKING_TIME,
+    NAME_LENGTH,
+    SMALL_INTEGER_MAX
+)
 from recipes.models import (
     FavoriteRecipe,
     Ingredient,
@@ -10,6 +19,9 @@ from recipes.models import (
     ShoppingCart,
     Tags
 )
+from recipes.utils import encode_base62
+from api.jobs import schedule_file_deletion, schedule_image_optimization
+from api.signals import recipes_bulk_created
 from api.users.serializers import UserSerializer
 from api.serializers import CartsSerializer
 
@@ -131,6 +143,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             ]
         )
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("recipe_ingredients")
@@ -139,13 +152,20 @@ class RecipeSerializer(serializers.ModelSerializer):
             author=self.context["request"].user, **validated_data
         )
         self.update_tags_and_ingredients(recipe, tags, ingredients)
+        schedule_image_optimization(recipe, "image")
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("recipe_ingredients")
+        old_image = instance.image.name
         self.update_tags_and_ingredients(instance, tags, ingredients)
-        return super().update(instance, validated_data)
+        instance = super().update(instance, validated_data)
+        if instance.image.name != old_image:
+            schedule_file_deletion(old_image)
+            schedule_image_optimization(instance, "image")
+        return instance
 
     def validate(self, value):
         tags = value.get("tags")
@@ -186,6 +206,162 @@ class RecipeSerializer(serializers.ModelSerializer):
         return RecipeReadSerializer(instance, context=self.context).data
 
 
+class BulkIngredientSerializer(serializers.Serializer):
+    """
+    Сериализатор ингредиента при массовом создании рецептов
+    """
+
+    id = serializers.IntegerField()
+    amount = serializers.IntegerField(
+        min_value=MIN_AMOUNT,
+        max_value=SMALL_INTEGER_MAX,
+        error_messages={"min_value": "Количество не может быть меньше 1."},
+    )
+
+
+class RecipeBulkListSerializer(serializers.ListSerializer):
+    """
+    Список рецептов для массового создания
+
+    Поля каждого рецепта проверяются без запросов к базе, затем все
+    упомянутые теги и ингредиенты проверяются двумя запросами на весь
+    список. Ошибки возвращаются списком по рецептам, как у DRF
+    для many=True: пустой словарь у корректных элементов.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Ожидается список рецептов."]}
+            )
+        if not data:
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Список рецептов пуст."]}
+            )
+        if len(data) > BULK_CREATE_LIMIT:
+            raise serializers.ValidationError({"non_field_errors": [
+                f"Не больше {BULK_CREATE_LIMIT} рецептов за запрос."
+            ]})
+        values, errors = [], []
+        for item in data:
+            try:
+                values.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as error:
+                values.append(None)
+                errors.append(error.detail)
+
+        valid = [value for value in values if value is not None]
+        known_tags = set(Tags.objects.filter(
+            id__in={tag for value in valid for tag in value["tags"]}
+        ).order_by().values_list("id", flat=True))
+        known_ingredients = set(Ingredient.objects.filter(id__in={
+            item["id"] for value in valid for item in value["ingredients"]
+        }).order_by().values_list("id", flat=True))
+        for value, item_errors in zip(values, errors):
+            if value is None:
+                continue
+            unknown_tags = set(value["tags"]) - known_tags
+            if unknown_tags:
+                item_errors["tags"] = [
+                    f"Тегов не существует: {sorted(unknown_tags)}"
+                ]
+            unknown_ingredients = {
+                item["id"] for item in value["ingredients"]
+            } - known_ingredients
+            if unknown_ingredients:
+                item_errors["ingredients"] = [
+                    "Такого ингредиента не существует: "
+                    f"{sorted(unknown_ingredients)}"
+                ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return values
+
+    @transaction.atomic
+    def create(self, validated_data):
+        author = self.context["request"].user
+        recipes = [
+            Recipe(
+                author=author,
+                name=value["name"],
+                text=value["text"],
+                cooking_time=value["cooking_time"],
+                image=value["image"],
+            )
+            for value in validated_data
+        ]
+        Recipe.objects.bulk_create(recipes, batch_size=BULK_BATCH_SIZE)
+        if recipes[0].pk is None:
+            # SQLite не возвращает id из bulk_create; имена файлов
+            # изображений уникальны и однозначно находят рецепты.
+            ids = dict(Recipe.objects.filter(
+                image__in=[recipe.image.name for recipe in recipes]
+            ).values_list("image", "id"))
+            for recipe in recipes:
+                recipe.pk = ids[recipe.image.name]
+        for recipe in recipes:
+            recipe.short_link = encode_base62(recipe.pk)
+        Recipe.objects.bulk_update(
+            recipes, ["short_link"], batch_size=BULK_BATCH_SIZE
+        )
+        Recipe.tags.through.objects.bulk_create(
+            [
+                Recipe.tags.through(recipe_id=recipe.pk, tags_id=tag_id)
+                for recipe, value in zip(recipes, validated_data)
+                for tag_id in value["tags"]
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(
+                    recipe_id=recipe.pk,
+                    ingredient_id=item["id"],
+                    amount=item["amount"],
+                )
+                for recipe, value in zip(recipes, validated_data)
+                for item in value["ingredients"]
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        recipes_bulk_created(recipes)
+        return recipes
+
+
+class RecipeBulkSerializer(serializers.Serializer):
+    """
+    Сериализатор рецепта при массовом создании
+    """
+
+    name = serializers.CharField(max_length=NAME_LENGTH)
+    text = serializers.CharField()
+    cooking_time = serializers.IntegerField(
+        min_value=MIN_COOKING_TIME, max_value=SMALL_INTEGER_MAX
+    )
+    image = Base64ImageField(required=True, allow_null=False)
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
+    ingredients = BulkIngredientSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        list_serializer_class = RecipeBulkListSerializer
+
+    def validate_tags(self, value):
+        if len(value) != len(set(value)):
+            raise serializers.ValidationError("Теги не должны повторяться")
+        return value
+
+    def validate_ingredients(self, value):
+        ingredient_ids = [item["id"] for item in value]
+        if len(ingredient_ids) != len(set(ingredient_ids)):
+            raise serializers.ValidationError(
+                "Ингредиенты не должны повторяться."
+            )
+        return value
+
+
 class RecipeReadSerializer(serializers.ModelSerializer):
     """
     Сериализатор рецептов для чтения
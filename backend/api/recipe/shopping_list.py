@@ -0,0 +1,36 @@
+from django.db.models import Sum
+from django.http import HttpResponse
+
+from recipes.models import RecipeIngredient
+
+
+def result_key(user_id, token):
+    return f"shopping_list:{user_id}:{token}"
+
+
+def render_shopping_list(user_id):
+    """Собирает текст списка покупок или возвращает None для пустой корзины."""
+    ingredients = (
+        RecipeIngredient.objects.filter(
+            recipe__shopping_carts__user_id=user_id
+        )
+        .values("ingredient__name", "ingredient__measurement_unit")
+        .annotate(total_amount=Sum("amount"))
+    )
+    lines = [
+        f'{item["ingredient__name"]}, '
+        f'({item["ingredient__measurement_unit"]}) — '
+        f'{item["total_amount"]}\n'
+        for item in ingredients
+    ]
+    if not lines:
+        return None
+    return "Список покупок:\n\n" + "".join(lines)
+
+
+def shopping_list_response(text):
+    response = HttpResponse(text, content_type="text/plain")
+    response["Content-Disposition"] = (
+        'attachment; filename="shopping_cart.txt"'
+    )
+    return response
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.db.models import Q
+
+from api.cache import LRUCache
+from api.generations import RECIPES, get_cache, get_generations
+from api.singleflight import coalesce
+from recipes.constants import SHORT_LINK_CACHE_SIZE
+from recipes.models import Recipe
+from recipes.utils import decode_base62, encode_base62
+
+# Наибольший id, который поместится в целочисленный столбец базы.
+MAX_RECIPE_ID = 2 ** 63 - 1
+
+_short_links = LRUCache(SHORT_LINK_CACHE_SIZE, name="short_links")
+
+
+def find_recipe_id(code):
+    """
+    Ищет рецепт по короткой ссылке в базе
+
+    Если по индексу short_link рецепта нет, код декодируется в id:
+    так открываются ссылки рецептов, загруженных в обход save(),
+    у которых поле ещё не заполнено.
+    Рецепт с другой записанной ссылкой по декодированному id не
+    находится, как и код с лишними ведущими нулями.
+    """
+    recipe_id = (
+        Recipe.objects.filter(short_link=code)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if recipe_id is not None:
+        return recipe_id
+    try:
+        recipe_id = decode_base62(code)
+    except ValueError:
+        return None
+    if recipe_id > MAX_RECIPE_ID or encode_base62(recipe_id) != code:
+        return None
+    return (
+        Recipe.objects.filter(pk=recipe_id)
+        .filter(Q(short_link__isnull=True) | Q(short_link=""))
+        .values_list("id", flat=True)
+        .first()
+    )
+
+
+def resolve_short_link(code):
+    """
+    Возвращает id рецепта по короткой ссылке или None
+
+    Промах локального кэша разрешается один раз на все процессы:
+    результат кладётся в общий кэш под поколением RECIPES.
+    """
+    recipe_id = _short_links.get(code)
+    if recipe_id is None:
+        generation, = get_generations(RECIPES)
+        recipe_id = coalesce(
+            f"short_link:{code}:{generation}",
+            lambda: find_recipe_id(code),
+            get_cache(),
+            settings.RESPONSE_CACHE["TIMEOUT"],
+        )
+        if recipe_id is not None:
+            _short_links.set(code, recipe_id)
+    return recipe_id
+
+
+def forget_short_link(code):
+    _short_links.delete(code)
@@ -1,16 +1,27 @@
-from django.db.models import Sum
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+import uuid
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 
-from api.recipe.filters import IngredientFilter, RecipeFilter
+from api.recipe.catalog import get_snapshot
+from api.recipe.filters import (
+    IngredientFilter,
+    RecipeFilter,
+    count_tags,
+    get_tag_ids,
+    parse_tag_slugs
+)
 from api.recipe.serializers import (
     FavouriteSerializer,
     IngredientsSerializer,
+    RecipeBulkSerializer,
     RecipeReadSerializer,
     RecipeSerializer,
     ShoppingCartSerializer,
@@ -20,12 +31,27 @@ from recipes.models import (
     FavoriteRecipe,
     Ingredient,
     Recipe,
-    RecipeIngredient,
     ShoppingCart,
     Tags
 )
+from api.recipe.index import recipe_index
+from api.recipe.payloads import build_recipe_payloads
 from api.recipe.permissions import IsAuthor
+from api.recipe.shopping_list import (
+    render_shopping_list,
+    result_key,
+    shopping_list_response
+)
+from api.recipe.shortlinks import resolve_short_link
+from api.generations import INGREDIENTS, RECIPES, TAGS, get_cache
+from api.response_cache import cached_response
+from api.signals import delete_list_entry
 from api.paginations import Pagination
+from api.throttling import limit_concurrency
+from jobs.models import Job
+from jobs.registry import enqueue
+from recipes.trending import ORDERING as TRENDING_ORDERING
+from recipes.constants import PAGE_SIZE, SIMILAR_LIMIT
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -35,12 +61,113 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filterset_fields = ("author", "tags")
     pagination_class = Pagination
     permission_classes = [IsAuthor, IsAuthenticatedOrReadOnly]
+    throttle_costs = {
+        "create": 10,
+        "update": 10,
+        "partial_update": 10,
+        "pantry": 3,
+        "similar": 2,
+        "get_download_shopping_cart": 20,
+        "request_download_shopping_cart": 5,
+        "bulk": 50,
+    }
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
             return RecipeReadSerializer
         return RecipeSerializer
 
+    @limit_concurrency("heavy")
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @limit_concurrency("heavy")
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    def paginated_payloads(self, queryset):
+        page = self.paginate_queryset(queryset.values_list("id", flat=True))
+        return self.get_paginated_response(
+            build_recipe_payloads(page, self.request)
+        )
+
+    def tag_facets(self, queryset):
+        """
+        Число рецептов по каждому тегу при текущих фильтрах
+
+        В режиме tags_mode=any фильтр по тегам не учитывается: счётчик
+        тега равен числу рецептов, которое вернёт выбор этого тега
+        вместе с остальными фильтрами. В режиме all считаются рецепты
+        текущей выдачи, ведь каждый выбранный тег её сужает.
+        """
+        params = self.request.query_params
+        if params.get("tags_mode") != "all" and "tags" in params:
+            params = params.copy()
+            del params["tags"]
+            queryset = self.filterset_class(
+                params, self.get_queryset(), request=self.request
+            ).qs
+        return count_tags(queryset)
+
+    @cached_response(RECIPES, TAGS, INGREDIENTS)
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        response = self.paginated_payloads(queryset)
+        if request.query_params.get("facets") == "tags":
+            response.data["facets"] = {"tags": self.tag_facets(queryset)}
+        return response
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=(AllowAny,),
+        url_path="trending",
+    )
+    @cached_response(RECIPES, TAGS, INGREDIENTS)
+    def trending(self, request):
+        """
+        Рецепты по убыванию популярности с затуханием во времени
+
+        Принимает те же фильтры, что и список. Порядок читается
+        по индексу на trending_score; анонимные ответы кэшируются,
+        поэтому новые события видны не позже RESPONSE_CACHE["TIMEOUT"].
+        """
+        return self.paginated_payloads(
+            self.filter_queryset(self.get_queryset()).order_by(
+                *TRENDING_ORDERING
+            )
+        )
+
+    @cached_response(RECIPES, TAGS, INGREDIENTS)
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            recipe_id = int(kwargs["pk"])
+        except ValueError:
+            raise Http404
+        payloads = build_recipe_payloads([recipe_id], request)
+        if not payloads:
+            raise Http404
+        return Response(payloads[0])
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[permissions.IsAuthenticated],
+        url_path="bulk",
+    )
+    @limit_concurrency("heavy")
+    def bulk(self, request):
+        """Создаёт список рецептов одной транзакцией."""
+        serializer = RecipeBulkSerializer(
+            data=request.data, many=True, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.save()
+        return Response(
+            build_recipe_payloads([recipe.pk for recipe in recipes], request),
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(
         detail=True,
         methods=('get',),
@@ -48,11 +175,81 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path='get-link',
     )
     def get_link(self, request, pk):
+        recipe = get_object_or_404(Recipe, pk=pk)
+        short_link = reverse(
+            "short-link", args=(recipe.ensure_short_link(),)
+        )
         return Response(
-            {'short-link': f'{request.get_full_path()}'[:-10]},
+            {'short-link': request.build_absolute_uri(short_link)},
             status=status.HTTP_200_OK
         )
 
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=(AllowAny,),
+        url_path="similar",
+    )
+    @cached_response(RECIPES, TAGS, INGREDIENTS)
+    def similar(self, request, pk):
+        """Рецепты, похожие по ингредиентам и тегам."""
+        try:
+            limit = int(request.query_params.get("limit", SIMILAR_LIMIT))
+        except ValueError:
+            limit = SIMILAR_LIMIT
+        try:
+            similar = recipe_index.similar(
+                int(pk), min(max(limit, 1), PAGE_SIZE)
+            )
+        except ValueError:
+            raise Http404
+        if similar is None:
+            raise Http404
+        return Response(build_recipe_payloads(
+            [recipe_id for recipe_id, _ in similar], request
+        ))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=(AllowAny,),
+        url_path="pantry",
+    )
+    def pantry(self, request):
+        """Что можно приготовить из имеющихся ингредиентов."""
+        try:
+            ingredient_ids = {
+                int(value)
+                for item in request.query_params.getlist("ingredients")
+                for value in item.split(",") if value
+            }
+        except ValueError:
+            return Response(
+                {"ingredients": "Ожидаются id ингредиентов."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not ingredient_ids:
+            return Response(
+                {"ingredients": "Укажите хотя бы один ингредиент."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        tag_ids = None
+        slugs = parse_tag_slugs(request.query_params.getlist("tags"))
+        if slugs:
+            tag_ids = get_tag_ids(slugs)
+        ranked = []
+        if tag_ids is None or tag_ids:
+            ranked = recipe_index.pantry(ingredient_ids, tag_ids)
+        page = self.paginate_queryset(ranked)
+        payloads = build_recipe_payloads(
+            [recipe_id for recipe_id, _, _ in page], request
+        )
+        # Рецепт, удалённый после ранжирования, выпадает из payloads.
+        missing = {recipe_id: count for recipe_id, count, _ in page}
+        for payload in payloads:
+            payload["missing_ingredients"] = missing[payload["id"]]
+        return self.get_paginated_response(payloads)
+
     @action(
         methods=["post"],
         detail=True,
@@ -132,10 +329,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         pk,
         model,
     ):
-        deleted_count, _ = model.objects.filter(
-            recipe__id=pk, user=request.user
-        ).delete()
-        if deleted_count:
+        entry = model.objects.filter(recipe__id=pk, user=request.user).first()
+        if entry is not None and delete_list_entry(entry):
             return Response(status=status.HTTP_204_NO_CONTENT)
         if not Recipe.objects.filter(id=pk).exists():
             return Response(
@@ -153,31 +348,46 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path="download_shopping_cart",
         permission_classes=[permissions.IsAuthenticated],
     )
+    @limit_concurrency("heavy")
     def get_download_shopping_cart(self, request):
-        ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__shopping_carts__user=request.user
+        token = request.query_params.get("token")
+        if token is not None:
+            return self.get_rendered_shopping_cart(request, token)
+        text = render_shopping_list(request.user.id)
+        if text is None:
+            return Response(
+                {"errors": "В корзине ничего нет."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total_amount=Sum("amount"))
+        return shopping_list_response(text)
+
+    @get_download_shopping_cart.mapping.post
+    def request_download_shopping_cart(self, request):
+        token = uuid.uuid4().hex
+        enqueue(
+            "recipes.render_shopping_list",
+            {"user_id": request.user.id, "token": token},
+            key=result_key(request.user.id, token),
         )
-        if not ingredients.exists():
+        return Response({"token": token}, status=status.HTTP_202_ACCEPTED)
+
+    def get_rendered_shopping_cart(self, request, token):
+        key = result_key(request.user.id, token)
+        text = get_cache().get(key)
+        if text is None:
+            if Job.objects.filter(
+                idempotency_key=key, status__in=(Job.QUEUED, Job.RUNNING)
+            ).exists():
+                return Response(
+                    {"token": token}, status=status.HTTP_202_ACCEPTED
+                )
+            raise Http404
+        if not text:
             return Response(
                 {"errors": "В корзине ничего нет."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        shopping_list_text = "Список покупок:\n\n"
-        for item in ingredients:
-            shopping_list_text += (
-                f'{item["ingredient__name"]}, '
-                f'({item["ingredient__measurement_unit"]}) — '
-                f'{item["total_amount"]}\n'
-            )
-        response = HttpResponse(shopping_list_text, content_type="text/plain")
-        response["Content-Disposition"] = (
-            'attachment; filename="shopping_cart.txt"'
-        )
-        return response
+        return shopping_list_response(text)
 
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
@@ -186,6 +396,14 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (AllowAny,)
     pagination_class = None
 
+    @cached_response(TAGS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response(TAGS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
@@ -195,3 +413,58 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     filterset_class = IngredientFilter
     search_fields = ('^name',)
+
+    @cached_response(INGREDIENTS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response(INGREDIENTS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=["get"])
+    def catalog(self, request):
+        """Перенаправляет на текущую версию справочника."""
+        response = redirect(
+            "ingredients-catalog-version", version=get_snapshot().version
+        )
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"catalog/(?P<version>[0-9a-f]{16})",
+    )
+    def catalog_version(self, request, version):
+        """
+        Отдаёт весь справочник заранее сжатым JSON
+
+        Адрес содержит хэш содержимого, поэтому ответ кэшируется
+        навсегда. Устаревшая версия отвечает 404, и клиент заново
+        запрашивает catalog/.
+        """
+        snapshot = get_snapshot()
+        if version != snapshot.version:
+            raise Http404("Версия справочника устарела")
+        encoding, content = snapshot.negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        response = HttpResponse(content, content_type="application/json")
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+        response["Vary"] = "Accept-Encoding"
+        response["ETag"] = f'"{version}-{encoding}"'
+        response["Cache-Control"] = (
+            f"public, max-age={settings.INGREDIENT_CATALOG['MAX_AGE']}, "
+            "immutable"
+        )
+        return response
+
+
+def short_link_redirect(request, code):
+    """Перенаправляет с короткой ссылки на страницу рецепта."""
+    recipe_id = resolve_short_link(code)
+    if recipe_id is None:
+        raise Http404("Рецепт не найден")
+    return redirect(f"/recipes/{recipe_id}/")
@@ -0,0 +1,37 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson с тем же компактным выводом, что и у DRF
+
+    Если orjson не установлен, запрошен отступ или данные содержат
+    типы, которые orjson не знает, работает обычный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        # Как и DRF, экранируем разделители строк для совместимости с JS.
+        return ret.replace(
+            "\u2028".encode(), b"\\u2028"
+        ).replace("\u2029".encode(), b"\\u2029")
@@ -0,0 +1,92 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from api.generations import get_cache, get_generations
+from api.singleflight import coalesce
+
+counters = {"hits": 0, "misses": 0}
+
+
+def make_key(request, view, groups, kwargs):
+    query = sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+        if any(values)
+    )
+    raw = repr((
+        request.build_absolute_uri("/"),
+        view.basename,
+        view.action,
+        sorted(kwargs.items()),
+        query,
+        get_generations(*groups),
+    ))
+    return "response:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+def cached_response(*groups):
+    """
+    Кэширует ответы анонимным пользователям на GET-запросы
+
+    Ключ строится по нормализованным параметрам запроса и поколениям
+    групп данных groups, поэтому запись в связанные модели сразу делает
+    старые записи недостижимыми. Кэшируется уже отрисованный JSON.
+    Одновременные промахи по одному ключу объединяются: ответ строит
+    один запрос, остальные получают его содержимое.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if (
+                request.method != "GET"
+                or not request.user.is_anonymous
+                or request.accepted_renderer.format != "json"
+            ):
+                return method(self, request, *args, **kwargs)
+            cache = get_cache()
+            key = make_key(request, self, groups, kwargs)
+            content = cache.get(key)
+            if content is not None:
+                counters["hits"] += 1
+                return build_response(content, request, "HIT")
+            counters["misses"] += 1
+            response = None
+
+            def render():
+                nonlocal response
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return None
+                return request.accepted_renderer.render(
+                    response.data,
+                    request.accepted_media_type,
+                    self.get_renderer_context(),
+                )
+
+            content = coalesce(
+                key, render, cache, settings.RESPONSE_CACHE["TIMEOUT"]
+            )
+            if content is None:
+                if response is None:
+                    response = method(self, request, *args, **kwargs)
+                return response
+            # Ответ, построенный другим запросом, считается попаданием.
+            return build_response(
+                content, request, "HIT" if response is None else "MISS"
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def build_response(content, request, status):
+    response = HttpResponse(
+        content, content_type=request.accepted_renderer.media_type
+    )
+    response["X-Cache"] = status
+    return response
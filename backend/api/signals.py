@@ -0,0 +1,286 @@
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import forget_tokens
+from api import generations
+from api.jobs import schedule_file_deletion, schedule_images_optimization
+from api.recipe.index import recipe_index
+from api.recipe.payloads import AUTHOR_FIELDS
+from api.recipe.shortlinks import forget_short_link
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tags
+)
+from recipes.trending import add_event, recompute_trending, remove_event
+from user.models import AuthorStats, Follow
+from user.stats import author_of_recipe, change_stats
+
+User = get_user_model()
+
+
+def bump_on_commit(*groups):
+    transaction.on_commit(lambda: generations.bump(*groups))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipes_changed(sender, **kwargs):
+    bump_on_commit(generations.RECIPES)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_index_recipe_changed(sender, instance, **kwargs):
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: recipe_index.recipes_changed([recipe_id]))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_index_ingredients_changed(sender, instance, **kwargs):
+    recipe_id = instance.recipe_id
+    transaction.on_commit(lambda: recipe_index.recipes_changed([recipe_id]))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_index_tags_changed(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        recipe_ids = pk_set or ()
+    else:
+        recipe_ids = (instance.pk,)
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    transaction.on_commit(lambda: recipe_index.recipes_changed(recipe_ids))
+
+
+@receiver(post_save, sender=Tags)
+@receiver(post_delete, sender=Tags)
+def tags_changed(sender, **kwargs):
+    bump_on_commit(generations.TAGS)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredients_changed(sender, **kwargs):
+    bump_on_commit(generations.INGREDIENTS)
+
+
+def recipes_bulk_created(recipes):
+    """
+    Повторяет обработчики post_save для рецептов, созданных bulk_create
+
+    bulk_create не отправляет сигналы, поэтому поколение, индекс
+    рецептов, счётчики автора и обработку изображений нужно
+    обновить явно.
+    """
+    bump_on_commit(generations.RECIPES)
+    for author_id, count in Counter(
+        recipe.author_id for recipe in recipes
+    ).items():
+        change_stats(author_id, recipes_count=count)
+    recipe_ids = [recipe.pk for recipe in recipes]
+    transaction.on_commit(lambda: recipe_index.recipes_changed(recipe_ids))
+    schedule_images_optimization(recipes, "image")
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    if instance.short_link:
+        forget_short_link(instance.short_link)
+    schedule_file_deletion(instance.image.name)
+
+
+@receiver(post_save, sender=User)
+def author_stats_user_created(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user_id=instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def author_stats_recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_stats(instance.author_id, recipes_count=1)
+
+
+@receiver(post_delete, sender=Recipe)
+def author_stats_recipe_deleted(sender, instance, **kwargs):
+    change_stats(instance.author_id, recipes_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def author_stats_follow_created(sender, instance, created, **kwargs):
+    if created:
+        change_stats(instance.author_id, followers_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def author_stats_follow_deleted(sender, instance, **kwargs):
+    change_stats(instance.author_id, followers_count=-1)
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+def author_stats_favorite_created(sender, instance, created, **kwargs):
+    if created:
+        change_stats(
+            author_of_recipe(instance.recipe_id), favorites_count=1
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def author_stats_recipe_favorites_deleted(sender, instance, **kwargs):
+    # Избранное удаляется каскадом одним DELETE без сигналов,
+    # поэтому счётчик автора уменьшается сразу на всё избранное рецепта.
+    favorites = FavoriteRecipe.objects.filter(
+        recipe_id=instance.pk
+    ).order_by().values("recipe_id").annotate(count=Count("*"))
+    change_stats(
+        instance.author_id,
+        favorites_count=-Coalesce(Subquery(favorites.values("count")), 0),
+    )
+
+
+@receiver(pre_delete, sender=User)
+def user_lists_deleted(sender, instance, **kwargs):
+    """
+    Учитывает избранное и корзину удаляемого пользователя
+
+    Строки удаляются каскадом без сигналов. Счётчики сдвигаются
+    одним UPDATE на автора, а популярность затронутых рецептов
+    пересчитывается после фиксации. Рецепты самого пользователя
+    удаляются вместе с ним и не учитываются.
+    """
+    favorites = (
+        FavoriteRecipe.objects.filter(user=instance)
+        .exclude(recipe__author=instance)
+        .order_by()
+        .values_list("recipe__author_id")
+        .annotate(count=Count("*"))
+    )
+    for author_id, count in favorites:
+        change_stats(author_id, favorites_count=-count)
+    recipe_ids = set()
+    for model in (FavoriteRecipe, ShoppingCart):
+        recipe_ids.update(
+            model.objects.filter(user=instance)
+            .exclude(recipe__author=instance)
+            .values_list("recipe_id", flat=True)
+        )
+    if recipe_ids:
+        transaction.on_commit(lambda: recompute_trending(recipe_ids))
+
+
+def trending_weight(sender):
+    if sender is FavoriteRecipe:
+        return settings.TRENDING["FAVORITE_WEIGHT"]
+    return settings.TRENDING["CART_WEIGHT"]
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+def trending_event_created(sender, instance, created, **kwargs):
+    if created:
+        add_event(
+            instance.recipe_id, instance.created, trending_weight(sender)
+        )
+
+
+def list_entry_deleted(instance):
+    """
+    Повторяет обработку удаления для строки избранного или корзины
+
+    У этих моделей нет обработчиков post_delete, чтобы при удалении
+    рецептов и пользователей они удалялись каскадом одним запросом.
+    Поэтому после удаления отдельной строки счётчик автора и
+    популярность рецепта нужно обновить явно.
+    """
+    if isinstance(instance, FavoriteRecipe):
+        change_stats(
+            author_of_recipe(instance.recipe_id), favorites_count=-1
+        )
+    remove_event(
+        instance.recipe_id, instance.created, trending_weight(type(instance))
+    )
+
+
+def delete_list_entry(instance):
+    """
+    Удаляет строку избранного или корзины и обновляет зависимые данные
+
+    Одновременные запросы могут загрузить одну и ту же строку; счётчик
+    и популярность меняет только тот, чей DELETE действительно её
+    удалил. Возвращает, была ли строка удалена.
+    """
+    with transaction.atomic():
+        deleted, _ = instance.delete()
+        if deleted:
+            list_entry_deleted(instance)
+    return bool(deleted)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    forget_tokens([instance.key])
+
+
+@receiver(pre_save, sender=User)
+def user_author_fields_changed(sender, instance, update_fields, using,
+                               **kwargs):
+    """
+    Отмечает, изменились ли данные автора, встроенные в ответы с рецептами
+
+    Сравнивает сохраняемые значения с записью в основной базе, чтобы
+    сохранение без update_fields (например, из админки или при смене
+    пароля) не сбрасывало кэш рецептов.
+    """
+    if instance.pk is None:
+        return
+    fields = set(AUTHOR_FIELDS)
+    if update_fields is not None:
+        fields &= set(update_fields)
+    stored = None
+    if fields:
+        stored = sender._base_manager.using(using).filter(
+            pk=instance.pk
+        ).values(*fields).first()
+    instance._author_changed = bool(fields) and (
+        stored is None
+        or any(getattr(instance, name) != stored[name] for name in fields)
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    if getattr(instance, "_author_changed", True):
+        bump_on_commit(generations.RECIPES)
+    forget_tokens(
+        Token.objects.filter(user_id=instance.pk).values_list(
+            "key", flat=True
+        )
+    )
@@ -0,0 +1,96 @@
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+
+_MISSING = object()
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+# Исходы обращений по ключам, попадают в /metrics.
+outcomes = Counter()
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _MISSING
+
+
+def coalesce(key, compute, cache=None, timeout=None):
+    """
+    Выполняет compute() один раз для одновременных обращений по key
+
+    Внутри процесса первый поток вычисляет значение, остальные ждут
+    его не дольше SINGLE_FLIGHT["WAIT_TIMEOUT"] секунд. Если передан
+    общий кэш, результат кладётся в него под тем же ключом на timeout
+    секунд, а между процессами вычисление защищает блокировка
+    lock:<key>, взятая через cache.add: остальные процессы опрашивают
+    кэш, пока блокировка не снята. По истечении ожидания, при ошибке
+    вычисляющего или если он вернул None, значение вычисляется заново:
+    объединение запросов не меняет результата, а только снимает
+    нагрузку. None в общий кэш не кладётся.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = Flight()
+    if not leader:
+        if (
+            flight.done.wait(settings.SINGLE_FLIGHT["WAIT_TIMEOUT"])
+            and flight.value is not _MISSING
+        ):
+            outcomes["coalesced"] += 1
+            return flight.value
+        outcomes["timeouts"] += 1
+        return compute()
+    try:
+        if cache is None:
+            outcomes["computed"] += 1
+            flight.value = compute()
+        else:
+            flight.value = compute_shared(key, compute, cache, timeout)
+        return flight.value
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def compute_shared(key, compute, cache, timeout):
+    """
+    Вычисляет значение под блокировкой в общем кэше
+
+    Атомарный add есть у Redis и Memcached; у файлового кэша возможна
+    гонка, при которой значение вычислят два процесса.
+    """
+    options = settings.SINGLE_FLIGHT
+    lock = f"lock:{key}"
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + options["WAIT_TIMEOUT"]
+    value = cache.get(key)
+    while value is None:
+        if cache.add(lock, token, options["LOCK_TIMEOUT"]):
+            break
+        if time.monotonic() >= deadline:
+            outcomes["timeouts"] += 1
+            return compute()
+        time.sleep(options["POLL_INTERVAL"])
+        value = cache.get(key)
+    else:
+        outcomes["shared"] += 1
+        return value
+    try:
+        outcomes["computed"] += 1
+        value = compute()
+        if value is not None:
+            cache.set(key, value, timeout)
+        return value
+    finally:
+        # После LOCK_TIMEOUT блокировку мог взять другой процесс.
+        if cache.get(lock) == token:
+            cache.delete(lock)
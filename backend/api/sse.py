@@ -0,0 +1,163 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.authtoken.models import Token
+
+from api.events import bus, feed, redeem_ticket
+from api.metrics import collector
+from recipes.constants import EVENT_KEEPALIVE, EVENT_POLL_INTERVAL
+
+EVENTS_PATH = "/api/events/"
+
+
+def _get_credentials(scope):
+    """
+    Возвращает токен из заголовка Authorization и билет из адреса
+
+    EventSource в браузере не умеет передавать заголовки, поэтому
+    браузер получает одноразовый билет через POST /api/events/ticket/.
+    Токен в адресе не принимается: адреса попадают в журналы прокси.
+    """
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            parts = value.decode("latin1").split()
+            if len(parts) == 2 and parts[0].lower() == "token":
+                return parts[1], None
+    query = parse_qs(scope.get("query_string", b"").decode("latin1"))
+    return None, query.get("ticket", [None])[0]
+
+
+def _get_user_id(key, ticket):
+    """Возвращает id активного пользователя по токену или билету."""
+    close_old_connections()
+    if ticket:
+        return redeem_ticket(ticket)
+    try:
+        token = Token.objects.select_related("user").get(key=key)
+    except Token.DoesNotExist:
+        return None
+    if not token.user.is_active:
+        return None
+    return token.user_id
+
+
+_feed_task = {"task": None}
+
+
+async def run_feed():
+    """Опрашивает новые рецепты, пока к процессу подключён хоть кто-то."""
+    poll = sync_to_async(feed.poll, thread_sensitive=False)
+    try:
+        while bus.connections_count():
+            await poll()
+            collector.flush()
+            await asyncio.sleep(EVENT_POLL_INTERVAL)
+    finally:
+        feed.reset()
+        _feed_task["task"] = None
+
+
+def ensure_feed():
+    if _feed_task["task"] is None:
+        _feed_task["task"] = asyncio.ensure_future(run_feed())
+
+
+async def _send_plain(send, status, body):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json; charset=utf-8")],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def format_event(event):
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return (
+        f"id: {event['id']}\nevent: recipe\ndata: {data}\n\n"
+    ).encode("utf-8")
+
+
+async def events_app(scope, receive, send):
+    """
+    ASGI-приложение потока server-sent events о новых рецептах авторов,
+    на которых подписан пользователь
+
+    Подписки проверяются при каждом новом рецепте, поэтому изменения
+    подписок действуют без переподключения.
+    """
+    if scope["method"] != "GET":
+        await _send_plain(send, 405, b'{"detail":"Method not allowed."}')
+        return
+    key, ticket = _get_credentials(scope)
+    user_id = None
+    if key or ticket:
+        user_id = await sync_to_async(_get_user_id)(key, ticket)
+    if user_id is None:
+        await _send_plain(send, 401, b'{"detail":"Invalid token."}')
+        return
+
+    subscription = bus.subscribe(user_id)
+    ensure_feed()
+
+    async def wait_disconnect():
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                # Пустое событие будит цикл отправки и завершает его.
+                subscription.push(None)
+                return
+
+    watcher = asyncio.ensure_future(wait_disconnect())
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await send({
+            "type": "http.response.body",
+            "body": f"retry: {EVENT_KEEPALIVE * 1000}\n\n".encode(),
+            "more_body": True,
+        })
+        while True:
+            try:
+                event = await subscription.get(EVENT_KEEPALIVE)
+            except asyncio.TimeoutError:
+                body = b": ping\n\n"
+            else:
+                if event is None:
+                    break
+                body = format_event(event)
+            await send({
+                "type": "http.response.body",
+                "body": body,
+                "more_body": True,
+            })
+    except OSError:
+        pass
+    finally:
+        subscription.close()
+        watcher.cancel()
+
+
+class EventStreamRouter:
+    """
+    Отдаёт поток событий напрямую, остальные запросы передаёт Django
+    """
+
+    def __init__(self, django_app):
+        self.django_app = django_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == EVENTS_PATH:
+            await events_app(scope, receive, send)
+            return
+        await self.django_app(scope, receive, send)
@@ -0,0 +1,199 @@
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Отклонённые запросы процесса по областям и группам, для /metrics.
+throttled = Counter()
+busy = Counter()
+
+
+def parse_rate(rate):
+    """Переводит "120/min" в (ёмкость ведра, пополнение в секунду)."""
+    number, period = rate.split("/")
+    capacity = int(number)
+    return capacity, capacity / DURATIONS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket
+
+    Ведро ёмкостью N из THROTTLING["RATES"][scope] пополняется
+    равномерно, запрос забирает столько жетонов, сколько стоит действие.
+    Стоимость задаётся словарём throttle_costs представления по имени
+    action, растёт с размером тела запроса и с номером страницы списка.
+    Состояние хранится в кэше THROTTLING["ALIAS"], общем для всех
+    процессов. Чтение и запись ведра выполняются под блокировкой
+    lock:<ключ ведра>, взятой через cache.add, поэтому параллельные
+    запросы одного клиента не тратят одни и те же жетоны. Запрос, не
+    дождавшийся блокировки за THROTTLING["BUCKET_LOCK_WAIT"] секунд,
+    отклоняется. Атомарный add есть у Redis и Memcached; на файловом
+    кэше при гонке два запроса могут взять блокировку одновременно.
+    """
+
+    scope = None
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def get_cost(self, request, view):
+        options = settings.THROTTLING
+        costs = getattr(view, "throttle_costs", {})
+        cost = costs.get(getattr(view, "action", None), 1)
+        length = request.META.get("CONTENT_LENGTH") or ""
+        if length.isdigit():
+            cost += int(length) // options["COST_BYTES"]
+        page = request.query_params.get("page", "")
+        if page.isdigit():
+            cost += int(page) // options["DEEP_PAGE"]
+        return cost
+
+    def allow_request(self, request, view):
+        options = settings.THROTTLING
+        rate = options["RATES"].get(self.scope)
+        ident = self.get_ident_key(request)
+        if rate is None or ident is None:
+            return True
+        capacity, refill = parse_rate(rate)
+        cost = min(self.get_cost(request, view), capacity)
+        cache = caches[options["ALIAS"]]
+        key = f"throttle:{self.scope}:{ident}"
+        lock = acquire_lock(cache, f"lock:{key}")
+        if lock is None:
+            self.wait_time = options["BUCKET_LOCK_WAIT"]
+            throttled[self.scope] += 1
+            return False
+        try:
+            now = time.time()
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            if tokens < cost:
+                self.wait_time = (cost - tokens) / refill
+                throttled[self.scope] += 1
+                return False
+            cache.set(
+                key, (tokens - cost, now), timeout=math.ceil(capacity / refill)
+            )
+            return True
+        finally:
+            release(cache, lock)
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    scope = "user"
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class IPBucketThrottle(TokenBucketThrottle):
+    scope = "ip"
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class ServiceBusy(APIException):
+    status_code = 503
+    default_detail = "Сервер перегружен, повторите запрос позже."
+    default_code = "service_busy"
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+def acquire_slot(group):
+    """
+    Занимает один из слотов группы в общем кэше и возвращает его ключ
+
+    Слот - запись, созданная cache.add со сроком
+    THROTTLING["CONCURRENCY_LEASE"] секунд, поэтому слот процесса,
+    завершившегося посреди запроса, освобождается сам. Возвращает
+    None, если все слоты заняты.
+    """
+    options = settings.THROTTLING
+    cache = caches[options["ALIAS"]]
+    limit = options["CONCURRENCY"][group]
+    token = uuid.uuid4().hex
+    start = random.randrange(limit)
+    for offset in range(limit):
+        key = f"concurrency:{group}:{(start + offset) % limit}"
+        if cache.add(key, token, options["CONCURRENCY_LEASE"]):
+            return key, token
+    return None
+
+
+def release_slot(slot):
+    release(caches[settings.THROTTLING["ALIAS"]], slot)
+
+
+def acquire_lock(cache, key):
+    """
+    Берёт блокировку key в кэше, ожидая не дольше BUCKET_LOCK_WAIT
+
+    Блокировка живёт BUCKET_LOCK_TIMEOUT секунд, поэтому процесс,
+    завершившийся с ней, не держит ведро дольше. Возвращает пару
+    (ключ, владелец) для release или None.
+    """
+    options = settings.THROTTLING
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + options["BUCKET_LOCK_WAIT"]
+    while not cache.add(key, token, options["BUCKET_LOCK_TIMEOUT"]):
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(options["BUCKET_LOCK_POLL"])
+    return key, token
+
+
+def release(cache, lock):
+    key, token = lock
+    # После истечения срока запись мог занять другой запрос.
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+def limit_concurrency(group):
+    """
+    Ограничивает число одновременных вызовов действия во всех процессах
+
+    Если все слоты группы THROTTLING["CONCURRENCY"][group] заняты,
+    запрос сразу получает 503 с Retry-After, не дожидаясь очереди,
+    и не занимает поток, нужный дешёвым запросам. Слоты хранятся в
+    кэше THROTTLING["ALIAS"]; атомарный add есть у Redis и Memcached,
+    на файловом кэше при гонке лимит может быть превышен на единицу.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            slot = acquire_slot(group)
+            if slot is None:
+                busy[group] += 1
+                raise ServiceBusy(settings.THROTTLING["RETRY_AFTER"])
+            try:
+                return method(self, request, *args, **kwargs)
+            finally:
+                release_slot(slot)
+
+        return wrapper
+
+    return decorator
@@ -1,7 +1,13 @@
 from django.urls import path, include
 
+from api.views import DatabasePoolView, EventTicketView
+
 
 urlpatterns = [
     path('users/', include('api.users.urls')),
+    path('pool-stats/', DatabasePoolView.as_view(), name='pool-stats'),
+    path(
+        'events/ticket/', EventTicketView.as_view(), name='events-ticket'
+    ),
     path('', include('api.recipe.urls')),
 ]
@@ -1,17 +1,31 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.validators import UnicodeUsernameValidator
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from djoser.serializers import UserSerializer as DjoserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
 from user.models import Follow
 from user.validator import validate_username
+from api.jobs import schedule_file_deletion, schedule_image_optimization
 from api.serializers import CartsSerializer
 
 User = get_user_model()
 
 
+class AuthorStatField(serializers.ReadOnlyField):
+    """
+    Счётчик автора из AuthorStats, 0 если строки счётчиков ещё нет
+    """
+
+    def get_attribute(self, instance):
+        try:
+            stats = instance.stats
+        except ObjectDoesNotExist:
+            return 0
+        return getattr(stats, self.field_name)
+
+
 class UserSerializer(DjoserSerializer):
     """
     Сериализатор для пользователя
@@ -41,6 +55,23 @@ class UserSerializer(DjoserSerializer):
         return False
 
 
+class UserProfileSerializer(UserSerializer):
+    """
+    Сериализатор профиля пользователя со счётчиками автора
+    """
+
+    recipes_count = AuthorStatField()
+    followers_count = AuthorStatField()
+    favorites_count = AuthorStatField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + (
+            "recipes_count",
+            "followers_count",
+            "favorites_count",
+        )
+
+
 class UserAvatarSerializer(serializers.Serializer):
     """
     Сериализатор аватара польтзователя
@@ -51,8 +82,11 @@ class UserAvatarSerializer(serializers.Serializer):
     def update(self, instance, validated_data):
         if not validated_data.get("avatar"):
             raise ValidationError("Поле пусто")
+        old_avatar = instance.avatar.name
         instance.avatar = validated_data.get("avatar")
         instance.save()
+        schedule_file_deletion(old_avatar)
+        schedule_image_optimization(instance, "avatar")
         return instance
 
     class Meta:
@@ -67,7 +101,9 @@ class SubscribingSerializer(serializers.ModelSerializer):
 
     is_subscribed = serializers.SerializerMethodField(default=False)
     recipes = serializers.SerializerMethodField(method_name="get_recipes")
-    recipes_count = serializers.ReadOnlyField(default=0)
+    recipes_count = AuthorStatField()
+    followers_count = AuthorStatField()
+    favorites_count = AuthorStatField()
 
     class Meta:
         model = User
@@ -81,6 +117,8 @@ class SubscribingSerializer(serializers.ModelSerializer):
             "is_subscribed",
             "recipes",
             "recipes_count",
+            "followers_count",
+            "favorites_count",
         )
         read_only_fields = ("id",)
 
@@ -106,9 +144,6 @@ class SubscribingSerializer(serializers.ModelSerializer):
             context={"request": request},
         ).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
 
 class SubscribeSerializer(serializers.ModelSerializer):
     """
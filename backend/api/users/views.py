@@ -6,10 +6,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from user.models import Follow
+from api.jobs import schedule_file_deletion
 from api.paginations import Pagination
 from api.users.serializers import (
     UserAvatarSerializer,
-    UserSerializer,
+    UserProfileSerializer,
     SubscribeSerializer,
     SubscribingSerializer
 )
@@ -18,8 +19,8 @@ User = get_user_model()
 
 
 class UsersViewSet(UserViewSet):
-    queryset = User.objects.all()
-    serializer_class = UserSerializer
+    queryset = User.objects.select_related("stats")
+    serializer_class = UserProfileSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = Pagination
 
@@ -30,7 +31,9 @@ class UsersViewSet(UserViewSet):
         permission_classes=[permissions.IsAuthenticated],
     )
     def get_me(self, request):
-        serializer = UserSerializer(request.user, context={'request': request})
+        serializer = UserProfileSerializer(
+            request.user, context={'request': request}
+        )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(
@@ -42,9 +45,11 @@ class UsersViewSet(UserViewSet):
     )
     def get_subscribe(self, request):
         """Получить список подписок пользователя."""
-        user = request.user
-        subscriptions = user.follower.all()
-        authors = [subscription.author for subscription in subscriptions]
+        authors = (
+            User.objects.filter(followings__user=request.user)
+            .select_related("stats")
+            .order_by("followings__id")
+        )
         pages = self.paginate_queryset(authors)
         serializer = SubscribingSerializer(
             pages, many=True, context={'request': request}
@@ -124,7 +129,7 @@ class UsersViewSet(UserViewSet):
                 {"errors": "Такого объекта не существует."},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        user.avatar.delete()
+        schedule_file_deletion(user.avatar.name)
         user.avatar = None
         user.save()
         return Response(
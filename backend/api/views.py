@@ -0,0 +1,33 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.events import issue_ticket
+from foodgram.db.pool import pool_stats
+
+
+class DatabasePoolView(APIView):
+    """
+    Счётчики пула соединений текущего воркера
+    """
+
+    permission_classes = (IsAdminUser,)
+    pagination_class = None
+
+    def get(self, request):
+        return Response(pool_stats())
+
+
+class EventTicketView(APIView):
+    """
+    Одноразовый билет для подключения браузера к потоку событий
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        return Response(
+            {"ticket": issue_ticket(request.user.id)},
+            status=status.HTTP_201_CREATED,
+        )
@@ -0,0 +1,106 @@
+import logging
+import time
+
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+from rest_framework import serializers
+
+from foodgram.db.pool import close_pools
+
+logger = logging.getLogger("foodgram.startup")
+
+SERIALIZERS = (
+    "api.recipe.serializers.RecipeReadSerializer",
+    "api.recipe.serializers.RecipeSerializer",
+    "api.recipe.serializers.IngredientsSerializer",
+    "api.recipe.serializers.TagsSerializer",
+    "api.users.serializers.UserSerializer",
+    "api.users.serializers.UserProfileSerializer",
+    "api.users.serializers.SubscribingSerializer",
+)
+
+
+def warm_urls():
+    """Импортирует все представления и строит таблицы reverse()."""
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.resolve("/api/recipes/")
+
+
+def build_fields(serializer):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    for field in serializer.fields.values():
+        if isinstance(field, serializers.BaseSerializer):
+            build_fields(field)
+
+
+def warm_serializers():
+    """
+    Строит поля сериализаторов
+
+    Поля собираются заново для каждого экземпляра, но первая сборка
+    импортирует поля DRF и drf_extra_fields и заполняет кэши _meta
+    моделей, на которые опирается ModelSerializer.
+    """
+    from django.utils.module_loading import import_string
+
+    for path in SERIALIZERS:
+        build_fields(import_string(path)())
+
+
+def warm_tags():
+    from api.recipe.filters import get_tag_slugs
+
+    get_tag_slugs()
+
+
+def warm_recipe_index():
+    from api.recipe.index import recipe_index
+
+    recipe_index.ensure_fresh()
+
+
+def warm_ingredient_catalog():
+    from api.recipe.catalog import get_snapshot
+
+    get_snapshot()
+
+
+STEPS = (
+    ("urls", warm_urls),
+    ("serializers", warm_serializers),
+    ("tags", warm_tags),
+    ("recipe_index", warm_recipe_index),
+    ("ingredient_catalog", warm_ingredient_catalog),
+)
+
+
+def warm_up():
+    """
+    Заполняет кэши процесса до приёма запросов
+
+    Шаг, упавший с ошибкой базы (например, до применения миграций),
+    пропускается: запуск не должен зависеть от прогрева. В конце
+    соединения закрываются вместе с пулами, чтобы процессы,
+    порождённые fork после предзагрузки, не делили сокеты с родителем.
+    """
+    started = time.monotonic()
+    for name, step in STEPS:
+        step_started = time.monotonic()
+        try:
+            step()
+        except DatabaseError as error:
+            logger.warning("Прогрев %s пропущен: %s", name, error)
+            continue
+        logger.info(
+            "Прогрев %s: %.1f мс",
+            name,
+            (time.monotonic() - step_started) * 1000,
+        )
+    connections.close_all()
+    for connection in connections.all():
+        close_pools(connection.alias, connection.settings_dict["NAME"])
+    logger.info(
+        "Прогрев завершён за %.1f мс", (time.monotonic() - started) * 1000
+    )
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+
+from recipes.generation import PASSWORD, DataGenerator
+
+User = get_user_model()
+
+
+def build_dataset(users=100, recipes=1000, seed=1):
+    """
+    Заполняет базу небольшим детерминированным набором данных
+    и возвращает первого пользователя с его паролем
+    """
+    user_ids = DataGenerator(
+        users=users,
+        recipes=recipes,
+        follows_per_user=10,
+        favorites_per_user=20,
+        carts_per_user=5,
+        seed=seed,
+    ).generate()
+    return User.objects.get(id=user_ids[0]), PASSWORD
@@ -0,0 +1,242 @@
+import json
+import re
+from urllib.parse import urlencode
+
+from django.db import connection
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tags
+)
+
+TABLE_ALIAS = re.compile(r'"(\w+)"\s+([A-Z]\d+)\b')
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+
+
+class QueryCollector:
+    """Запоминает SELECT-запросы, выполненные через соединение."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def get_scenarios(user):
+    """
+    Возвращает пары (имя, функция) для горячих путей API
+
+    Запросы к API выполняются через настоящие представления, поэтому
+    в план попадают ровно те запросы, которые строят RecipeViewSet,
+    фильтры и пагинация. Проверки наличия в избранном и корзине
+    повторяют запросы из action_with_favoutite_and_shop.
+    """
+    recipe = Recipe.objects.values("id", "author_id").first()
+    if recipe is None:
+        return []
+    slugs = list(
+        Tags.objects.order_by("id").values_list("slug", flat=True)[:2]
+    )
+    ingredient = Ingredient.objects.values_list("name", flat=True).first()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    def get(path, **params):
+        query = urlencode(params, doseq=True)
+        return lambda: client.get(f"{path}?{query}" if query else path)
+
+    def exists(model):
+        return lambda: model.objects.filter(
+            recipe_id=recipe["id"], user=user
+        ).exists()
+
+    recipes = "/api/recipes/"
+    author = recipe["author_id"]
+    return [
+        ("recipe_list", get(recipes)),
+        ("recipe_list_tags", get(recipes, tags=slugs)),
+        ("recipe_list_tags_all", get(recipes, tags=slugs, tags_mode="all")),
+        ("recipe_list_author", get(recipes, author=author)),
+        ("recipe_list_author_tags", get(recipes, author=author, tags=slugs)),
+        ("recipe_list_favorited", get(recipes, is_favorited=1)),
+        (
+            "recipe_list_favorited_tags",
+            get(recipes, is_favorited=1, tags=slugs),
+        ),
+        ("recipe_list_shopping_cart", get(recipes, is_in_shopping_cart=1)),
+        (
+            "recipe_list_facets",
+            get(recipes, is_favorited=1, tags=slugs, facets="tags"),
+        ),
+        ("recipe_trending", get(f"{recipes}trending/")),
+        ("recipe_trending_tags", get(f"{recipes}trending/", tags=slugs)),
+        ("recipe_detail", get(f"{recipes}{recipe['id']}/")),
+        ("ingredient_search", get("/api/ingredients/", name=ingredient[:2])),
+        ("shopping_cart_download", get(f"{recipes}download_shopping_cart/")),
+        ("subscriptions", get("/api/users/subscriptions/")),
+        ("favorite_exists", exists(FavoriteRecipe)),
+        ("shopping_cart_exists", exists(ShoppingCart)),
+    ]
+
+
+def collect(function):
+    collector = QueryCollector()
+    with connection.execute_wrapper(collector):
+        result = function()
+    status = getattr(result, "status_code", None)
+    unique = {}
+    for sql, params in collector.queries:
+        unique.setdefault((sql, tuple(params or ())), (sql, params))
+    return status, list(unique.values())
+
+
+def table_rows(table):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE relname = %s", [table]
+            )
+            row = cursor.fetchone()
+            return int(row[0]) if row else 0
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}"
+        )
+        return cursor.fetchone()[0]
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from walk(child)
+
+
+def postgresql_flags(plan):
+    flags = []
+    for node in walk(plan):
+        kind = node["Node Type"]
+        if kind == "Seq Scan":
+            flags.append({
+                "kind": "seq_scan",
+                "table": node.get("Relation Name"),
+                "filter": node.get("Filter"),
+                "rows": node.get("Plan Rows"),
+            })
+            if node.get("Filter"):
+                flags.append({
+                    "kind": "missing_index",
+                    "table": node.get("Relation Name"),
+                    "detail": node["Filter"],
+                })
+        elif kind in ("Sort", "Incremental Sort"):
+            flags.append({
+                "kind": "sort",
+                "key": node.get("Sort Key"),
+                "method": node.get("Sort Method"),
+            })
+    return flags
+
+
+def sqlite_flags(details, aliases):
+    flags = []
+    for detail in details:
+        scan = SQLITE_SCAN.match(detail)
+        if scan and "USING" not in scan.group(2):
+            name = scan.group(1)
+            if name in ("CONSTANT", "SUBQUERY"):
+                continue
+            flags.append({
+                "kind": "seq_scan",
+                "table": aliases.get(name, name),
+                "detail": detail,
+            })
+        elif "TEMP B-TREE" in detail:
+            flags.append({"kind": "sort", "detail": detail})
+        if "AUTOMATIC" in detail:
+            name = detail.split()[1]
+            flags.append({
+                "kind": "missing_index",
+                "table": aliases.get(name, name),
+                "detail": detail,
+            })
+    return flags
+
+
+def explain(sql, params, analyze=False):
+    """
+    Возвращает план запроса и найденные в нём проблемы
+
+    На PostgreSQL план берётся в формате JSON (с ANALYZE и BUFFERS,
+    если analyze=True), на SQLite - через EXPLAIN QUERY PLAN.
+    Для остальных СУБД возвращается сырой вывод EXPLAIN без разбора.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else (
+                "FORMAT JSON"
+            )
+            cursor.execute(f"EXPLAIN ({options}) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return plan, postgresql_flags(plan[0]["Plan"])
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            details = [row[-1] for row in cursor.fetchall()]
+            aliases = {
+                alias: table for table, alias in TABLE_ALIAS.findall(sql)
+            }
+            return details, sqlite_flags(details, aliases)
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return [list(row) for row in cursor.fetchall()], []
+
+
+def run(user, analyze=False, only=None, min_rows=1000):
+    """
+    Снимает планы запросов всех сценариев
+
+    Полные просмотры таблиц меньше min_rows строк не считаются
+    проблемой: на маленьких таблицах они дешевле индекса.
+    """
+    sizes = {}
+
+    def significant(flag):
+        if flag["kind"] != "seq_scan":
+            return True
+        table = flag.get("table")
+        if table not in sizes:
+            sizes[table] = table_rows(table)
+        return sizes[table] >= min_rows
+
+    report = []
+    for name, function in get_scenarios(user):
+        if only and name not in only:
+            continue
+        status, queries = collect(function)
+        items = []
+        for sql, params in queries:
+            plan, flags = explain(sql, params, analyze)
+            items.append({
+                "sql": sql,
+                "params": [str(param) for param in params or ()],
+                "plan": plan,
+                "flags": [flag for flag in flags if significant(flag)],
+            })
+        report.append({"name": name, "status": status, "queries": items})
+    return {
+        "vendor": connection.vendor,
+        "analyze": analyze and connection.vendor == "postgresql",
+        "min_rows": min_rows,
+        "table_rows": sizes,
+        "scenarios": report,
+        "flagged": sum(
+            1 for scenario in report
+            for query in scenario["queries"] if query["flags"]
+        ),
+    }
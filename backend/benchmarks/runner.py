@@ -0,0 +1,299 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.recipe.catalog import get_snapshot
+from api.recipe.payloads import build_recipe_payloads
+from api.recipe.serializers import RecipeReadSerializer
+from api.renderers import FastJSONRenderer
+from benchmarks.fixtures import build_dataset
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+
+
+class Scenario:
+    """
+    Один замеряемый запрос к API
+
+    prepare выполняется перед каждым повтором и не попадает в замер.
+    """
+
+    def __init__(
+        self, name, method, path, client="user", data=None,
+        prepare=None, iterations=None, expected=200,
+    ):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.client = client
+        self.data = data
+        self.prepare = prepare
+        self.iterations = iterations
+        self.expected = expected
+
+    def request(self, clients):
+        client = clients[self.client]
+        return getattr(client, self.method)(
+            self.path, self.data, format="json"
+        )
+
+
+class FunctionScenario(Scenario):
+    """
+    Замер вызова функции без HTTP-слоя
+    """
+
+    status_code = 200
+
+    def __init__(self, name, function, **kwargs):
+        super().__init__(name, None, None, **kwargs)
+        self.function = function
+
+    def request(self, clients):
+        self.function()
+        return self
+
+
+def render_with_serializer(recipes, request):
+    data = RecipeReadSerializer(
+        recipes, many=True, context={"request": request}
+    ).data
+    return JSONRenderer().render(data)
+
+
+def render_with_payloads(recipe_ids, request):
+    return FastJSONRenderer().render(
+        build_recipe_payloads(recipe_ids, request)
+    )
+
+
+def get_serializer_scenarios(user, page_size=50):
+    """
+    Сравнивает RecipeReadSerializer с быстрым путём чтения
+    на одной и той же странице рецептов
+    """
+    recipe_ids = list(
+        Recipe.objects.values_list("id", flat=True)[:page_size]
+    )
+    request = Request(APIRequestFactory().get("/api/recipes/"))
+    for request.user in (AnonymousUser(), user):
+        recipes = Recipe.objects.filter(id__in=recipe_ids)
+        if render_with_serializer(recipes, request) != render_with_payloads(
+            recipe_ids, request
+        ):
+            raise AssertionError(
+                "Быстрый путь чтения расходится с RecipeReadSerializer"
+            )
+
+    def serializer():
+        recipes = Recipe.objects.filter(id__in=recipe_ids)
+        return render_with_serializer(recipes, request)
+
+    def payloads():
+        return render_with_payloads(recipe_ids, request)
+
+    return [
+        FunctionScenario("serializer_drf_page", serializer),
+        FunctionScenario("serializer_fast_page", payloads),
+    ]
+
+
+def get_scenarios(user, password):
+    recipe = Recipe.objects.exclude(favorites__user=user).first()
+    author_id = Recipe.objects.values_list("author_id", flat=True).first()
+
+    def unfavorite():
+        FavoriteRecipe.objects.filter(user=user, recipe=recipe).delete()
+
+    def favorite():
+        FavoriteRecipe.objects.get_or_create(user=user, recipe=recipe)
+
+    def uncart():
+        ShoppingCart.objects.filter(user=user, recipe=recipe).delete()
+
+    def cart():
+        ShoppingCart.objects.get_or_create(user=user, recipe=recipe)
+
+    detail = f"/api/recipes/{recipe.id}/"
+    return [
+        Scenario("recipe_list_anonymous", "get", "/api/recipes/", "anon"),
+        Scenario("recipe_list", "get", "/api/recipes/?limit=6"),
+        Scenario(
+            "recipe_list_filtered", "get",
+            "/api/recipes/?tags=breakfast&tags=lunch&is_favorited=1",
+        ),
+        Scenario(
+            "recipe_list_facets", "get",
+            "/api/recipes/?tags=breakfast&is_favorited=1&facets=tags",
+        ),
+        Scenario(
+            "recipe_list_author", "get",
+            f"/api/recipes/?author={author_id}&is_in_shopping_cart=0",
+        ),
+        Scenario("recipe_detail_anonymous", "get", detail, "anon"),
+        Scenario("recipe_detail", "get", detail),
+        Scenario("recipe_similar", "get", f"{detail}similar/"),
+        Scenario(
+            "recipe_pantry", "get",
+            "/api/recipes/pantry/?ingredients=1,2,3,4,5,6,7,8&tags=lunch",
+        ),
+        Scenario("recipe_trending", "get", "/api/recipes/trending/"),
+        Scenario(
+            "ingredient_autocomplete", "get", "/api/ingredients/?name=ка",
+            "anon",
+        ),
+        Scenario("ingredient_list", "get", "/api/ingredients/", "anon"),
+        Scenario(
+            "ingredient_catalog", "get",
+            f"/api/ingredients/catalog/{get_snapshot().version}/", "anon",
+        ),
+        Scenario("tag_list", "get", "/api/tags/", "anon"),
+        Scenario(
+            "favorite_add", "post", f"{detail}favorite/",
+            prepare=unfavorite, expected=201,
+        ),
+        Scenario(
+            "favorite_remove", "delete", f"{detail}favorite/",
+            prepare=favorite, expected=204,
+        ),
+        Scenario(
+            "cart_add", "post", f"{detail}shopping_cart/",
+            prepare=uncart, expected=201,
+        ),
+        Scenario(
+            "cart_remove", "delete", f"{detail}shopping_cart/",
+            prepare=cart, expected=204,
+        ),
+        Scenario(
+            "shopping_cart_download", "get",
+            "/api/recipes/download_shopping_cart/",
+        ),
+        Scenario(
+            "subscriptions", "get",
+            "/api/users/subscriptions/?recipes_limit=3",
+        ),
+        Scenario(
+            "token_login", "post", "/api/auth/token/login/", "anon",
+            data={"email": user.email, "password": password},
+            iterations=5,
+        ),
+    ]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def measure(scenario, clients, iterations, warmup):
+    iterations = scenario.iterations or iterations
+    timings = []
+    queries = 0
+    for step in range(warmup + iterations):
+        if scenario.prepare:
+            scenario.prepare()
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = scenario.request(clients)
+            elapsed = time.perf_counter() - start
+        if response.status_code != scenario.expected:
+            raise AssertionError(
+                f"{scenario.name}: ожидался статус {scenario.expected}, "
+                f"получен {response.status_code}"
+            )
+        if step >= warmup:
+            timings.append(elapsed * 1000)
+            queries = len(captured)
+
+    # Медиана по трём запросам: тестовый клиент на каждом запросе
+    # пополняет реестр weakref.finalize, и редкое расширение этого
+    # словаря не должно считаться регрессией сценария.
+    peaks = []
+    for _ in range(3):
+        if scenario.prepare:
+            scenario.prepare()
+        tracemalloc.start()
+        scenario.request(clients)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    peak = statistics.median(peaks)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p90_ms": round(percentile(timings, 0.9), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "queries": queries,
+        "alloc_peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run(iterations=30, warmup=3, only=None, dataset=None):
+    """
+    Прогоняет сценарии на текущей базе и возвращает результаты
+    """
+    user, password = build_dataset(**(dataset or {}))
+    clients = {"anon": APIClient(), "user": APIClient()}
+    token = Token.objects.create(user=user)
+    clients["user"].credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    results = {}
+    scenarios = get_scenarios(user, password) + get_serializer_scenarios(user)
+    # Ограничители частоты остаются в замере, но не должны срабатывать.
+    rates = settings.THROTTLING["RATES"]
+    throttling = {
+        **settings.THROTTLING,
+        "RATES": {scope: "1000000/s" for scope in rates},
+    }
+    with override_settings(THROTTLING=throttling):
+        for scenario in scenarios:
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = measure(
+                scenario, clients, iterations, warmup
+            )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Возвращает список регрессий относительно сохранённой базовой линии
+
+    Число запросов сравнивается строго, время и память - с допуском.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["queries"] > expected["queries"]:
+            regressions.append(
+                f"{name}: запросов {result['queries']} > "
+                f"{expected['queries']}"
+            )
+        for metric in ("p50_ms", "alloc_peak_kb"):
+            limit = expected[metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name}: {metric} {result[metric]} > {limit:.1f}"
+                )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write("\n")
@@ -4,4 +4,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.sse import EventStreamRouter  # noqa: E402
+
+application = EventStreamRouter(django_application)
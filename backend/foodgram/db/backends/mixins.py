@@ -0,0 +1,75 @@
+from functools import partial
+
+from foodgram.db.pool import ConnectionPool, close_pools, get_pool
+
+POOL_DEFAULTS = {
+    "MAX_SIZE": 10,
+    "TIMEOUT": 5.0,
+    "CHECK_AFTER": 10.0,
+    "MAX_LIFETIME": 1800.0,
+}
+
+
+def _check_connection(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        cursor.close()
+    return True
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Берёт соединения из пула процесса вместо подключения к базе
+    на каждый запрос и возвращает их в пул при закрытии
+
+    Параметры пула задаются ключом POOL в настройках базы данных.
+    """
+
+    @property
+    def pool(self):
+        # Тестовый прогон меняет NAME на лету, поэтому пул привязан
+        # не только к алиасу, но и к имени базы.
+        return get_pool(
+            (self.alias, self.settings_dict["NAME"]), self._create_pool
+        )
+
+    def _create_pool(self):
+        options = {**POOL_DEFAULTS, **self.settings_dict.get("POOL", {})}
+        return ConnectionPool(
+            connect=partial(
+                super().get_new_connection, self.get_connection_params()
+            ),
+            check=_check_connection,
+            max_size=int(options["MAX_SIZE"]),
+            timeout=float(options["TIMEOUT"]),
+            check_after=float(options["CHECK_AFTER"]),
+            max_lifetime=float(options["MAX_LIFETIME"]),
+            error_class=self.Database.OperationalError,
+        )
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            try:
+                self.connection.rollback()
+            except self.Database.Error:
+                self.pool.release(self.connection, reusable=False)
+                raise
+            self.pool.release(self.connection)
+
+
+class PooledDatabaseCreationMixin:
+    """
+    Закрывает соединения пула перед удалением тестовой базы
+    """
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(self.connection.alias, test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
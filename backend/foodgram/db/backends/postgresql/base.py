@@ -0,0 +1,16 @@
+from django.db.backends.postgresql import base, creation
+
+from foodgram.db.backends.mixins import (
+    PooledDatabaseCreationMixin,
+    PooledDatabaseWrapperMixin
+)
+
+
+class DatabaseCreation(
+    PooledDatabaseCreationMixin, creation.DatabaseCreation
+):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
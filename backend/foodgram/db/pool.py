@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from collections import deque
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Пул соединений с базой данных внутри процесса воркера
+
+    Соединения создаются функцией connect, проверяются функцией check
+    при выдаче, если простаивали дольше check_after секунд, и
+    пересоздаются по истечении max_lifetime. Если все max_size соединений
+    заняты, запрос ждёт не дольше timeout секунд.
+    """
+
+    def __init__(
+        self,
+        connect,
+        check,
+        max_size=10,
+        timeout=5.0,
+        check_after=10.0,
+        max_lifetime=1800.0,
+        error_class=RuntimeError,
+    ):
+        self.connect = connect
+        self.check = check
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_lifetime = max_lifetime
+        self.error_class = error_class
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        self._pid = os.getpid()
+        self.counters = dict.fromkeys(
+            ("checkouts", "waits", "timeouts", "connects", "reconnects"), 0
+        )
+
+    def acquire(self):
+        self._check_fork()
+        deadline = None
+        with self._condition:
+            self.counters["checkouts"] += 1
+            while True:
+                while self._idle:
+                    connection, released_at = self._idle.pop()
+                    if self._is_healthy(connection, released_at):
+                        return connection
+                    self.counters["reconnects"] += 1
+                    self._discard(connection)
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                if deadline is None:
+                    self.counters["waits"] += 1
+                    deadline = time.monotonic() + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counters["timeouts"] += 1
+                    raise self.error_class(
+                        "Не удалось получить соединение из пула "
+                        f"за {self.timeout} с"
+                    )
+                self._condition.wait(remaining)
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.counters["connects"] += 1
+            self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def release(self, connection, reusable=True):
+        if self._check_fork():
+            return
+        with self._condition:
+            if reusable and not self._expired(connection):
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                **self.counters,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    def close_all(self):
+        with self._condition:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+
+    def _is_healthy(self, connection, released_at):
+        if self._expired(connection):
+            return False
+        if time.monotonic() - released_at < self.check_after:
+            return True
+        try:
+            return self.check(connection)
+        except Exception:
+            return False
+
+    def _expired(self, connection):
+        created_at = self._created_at.get(id(connection))
+        return (
+            created_at is not None
+            and time.monotonic() - created_at > self.max_lifetime
+        )
+
+    def _discard(self, connection):
+        self._size -= 1
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _check_fork(self):
+        """
+        После fork сокеты родителя не закрываются, а просто забываются,
+        чтобы не оборвать его соединения. Возвращает True, если пул
+        был сброшен.
+        """
+        if self._pid == os.getpid():
+            return False
+        with self._condition:
+            self._idle.clear()
+            self._created_at.clear()
+            self._size = 0
+            self._pid = os.getpid()
+        return True
+
+
+def get_pool(key, factory):
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = factory()
+    return pool
+
+
+def close_pools(alias, name):
+    """Закрывает простаивающие соединения пула с базой name."""
+    pool = _pools.get((alias, name))
+    if pool is not None:
+        pool.close_all()
+
+
+def pool_stats():
+    """Возвращает счётчики всех пулов процесса."""
+    return {
+        f"{alias}:{name}": pool.stats()
+        for (alias, name), pool in list(_pools.items())
+    }
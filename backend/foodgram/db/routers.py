@@ -0,0 +1,41 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_use_replicas = ContextVar("use_replicas", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Разрешает чтение с реплик внутри блока."""
+    token = _use_replicas.set(True)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Отправляет чтение на реплики, запись - на основную базу
+
+    Реплики из DATABASE_REPLICAS используются только внутри
+    replica_reads(): его включает ReplicaRoutingMiddleware для
+    безопасных запросов к API. Команды, фоновые задачи и запросы
+    на запись читают из основной базы и не видят отставания реплик.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and _use_replicas.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
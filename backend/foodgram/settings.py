@@ -1,4 +1,5 @@
 import os
+from datetime import datetime, timezone
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -28,10 +29,14 @@ INSTALLED_APPS = [
     'django_filters',
     "recipes.apps.RecipesConfig",
     "user.apps.UserConfig",
+    "jobs.apps.JobsConfig",
     'api.apps.ApiConfig'
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.PerformanceMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,15 +69,39 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'foodgram.db.backends.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', 5432),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            'CHECK_AFTER': float(os.getenv('DB_POOL_CHECK_AFTER', 10)),
+            'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        },
     }
 }
 
+for index, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1
+):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['foodgram.db.routers.ReplicaRouter']
+
+REPLICA_ROUTING = {
+    'CACHE': 'throttling',
+    'STICKY_SECONDS': int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5)),
+    'PATHS': ('/api/',),
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -105,6 +134,38 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+MEDIA_DELIVERY = {
+    'ACCEL_REDIRECT': os.getenv('MEDIA_ACCEL_REDIRECT', '/protected-media/'),
+    'PREFIXES': ('recipes/images/', 'user/avatar/'),
+    'MAX_AGE': 3600,
+    'IMMUTABLE_MAX_AGE': 365 * 24 * 3600,
+}
+
+TRENDING = {
+    'HALF_LIFE': float(os.getenv('TRENDING_HALF_LIFE_HOURS', 72)) * 3600,
+    'FAVORITE_WEIGHT': 1.0,
+    'CART_WEIGHT': 0.5,
+    'EPOCH': datetime(2024, 1, 1, tzinfo=timezone.utc),
+    'RECOMPUTE_INTERVAL': int(os.getenv('TRENDING_RECOMPUTE_INTERVAL', 3600)),
+}
+
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True').lower() == 'true',
+    'DIRECTORY': os.getenv('METRICS_DIRECTORY', '/tmp/foodgram-metrics'),
+    'FLUSH_INTERVAL': float(os.getenv('METRICS_FLUSH_INTERVAL', 5)),
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+}
+
+WARMUP = {
+    'ON_READY': os.getenv('WARMUP_ON_READY', 'False').lower() == 'true',
+}
+
+INGREDIENT_CATALOG = {
+    'GZIP_LEVEL': 9,
+    'BROTLI_QUALITY': 11,
+    'MAX_AGE': 365 * 24 * 3600,
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'user.Users'
@@ -116,9 +177,136 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.UserBucketThrottle',
+        'api.throttling.IPBucketThrottle',
+    ],
+}
+
+JOBS = {
+    'THREADS': int(os.getenv('JOBS_THREADS', 4)),
+    'POLL_INTERVAL': float(os.getenv('JOBS_POLL_INTERVAL', 1)),
+    'LOCK_TIMEOUT': int(os.getenv('JOBS_LOCK_TIMEOUT', 600)),
+    'KEEP_DONE': 7 * 24 * 3600,
+    'KEEP_FAILED': 30 * 24 * 3600,
+    'RESULT_TTL': 3600,
+    'RECONCILE_INTERVAL': int(
+        os.getenv('JOBS_RECONCILE_INTERVAL', 24 * 3600)
+    ),
+    'DELETE_DELAY': 3600,
+    'IMAGE_MAX_SIDE': 1600,
+}
+
+THROTTLING = {
+    'ALIAS': 'throttling',
+    'RATES': {
+        'user': os.getenv('THROTTLE_USER_RATE', '600/min'),
+        'ip': os.getenv('THROTTLE_IP_RATE', '1200/min'),
+    },
+    'COST_BYTES': 256 * 1024,
+    'DEEP_PAGE': 20,
+    'BUCKET_LOCK_TIMEOUT': 1,
+    'BUCKET_LOCK_WAIT': 0.05,
+    'BUCKET_LOCK_POLL': 0.002,
+    'CONCURRENCY': {
+        'heavy': int(os.getenv('THROTTLE_HEAVY_CONCURRENCY', 4)),
+    },
+    'CONCURRENCY_LEASE': int(os.getenv('THROTTLE_CONCURRENCY_LEASE', 120)),
+    'RETRY_AFTER': 1,
+}
+
+TOKEN_CACHE = {
+    'MAX_SIZE': int(os.getenv('TOKEN_CACHE_MAX_SIZE', 10000)),
+    'TTL': float(os.getenv('TOKEN_CACHE_TTL', 30)),
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': os.getenv(
+            'RESPONSE_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'RESPONSE_CACHE_LOCATION', '/tmp/foodgram-responses'
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+    'throttling': {
+        'BACKEND': os.getenv(
+            'THROTTLE_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'THROTTLE_CACHE_LOCATION', '/tmp/foodgram-throttling'
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('THROTTLE_CACHE_MAX_ENTRIES', 50000)),
+        },
+    },
+}
+
+RESPONSE_CACHE = {
+    'ALIAS': 'responses',
+    'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', 600)),
+}
+
+SINGLE_FLIGHT = {
+    'WAIT_TIMEOUT': float(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', 5)),
+    'LOCK_TIMEOUT': int(os.getenv('SINGLE_FLIGHT_LOCK_TIMEOUT', 10)),
+    'POLL_INTERVAL': 0.02,
+}
+
+RECIPE_INDEX = {
+    'CHANGES_TTL': int(os.getenv('RECIPE_INDEX_CHANGES_TTL', 3600)),
+    'MAX_CHANGES': 1000,
+    'SIMILAR_CACHE_SIZE': 10000,
+    'MAX_POSTING': 20000,
+    'INGREDIENT_WEIGHT': 0.8,
+}
+
+PERFORMANCE = {
+    'SAMPLE_RATE': float(os.getenv('PERFORMANCE_SAMPLE_RATE', 0.1)),
+    'DUPLICATE_QUERIES': (
+        os.getenv('PERFORMANCE_DUPLICATE_QUERIES', 'True').lower() == 'true'
+    ),
+    'DUPLICATE_THRESHOLD': int(
+        os.getenv('PERFORMANCE_DUPLICATE_THRESHOLD', 3)
+    ),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERFORMANCE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'foodgram.startup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -0,0 +1,58 @@
+"""
+Профиль настроек для локального запуска и бенчмарков на SQLite
+"""
+import os
+
+from foodgram.settings import *  # noqa: F401,F403
+from foodgram.settings import BASE_DIR, CACHES, MEDIA_DELIVERY, PERFORMANCE
+
+DEBUG = os.getenv("DEBUG", 'True').lower() == 'true'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'foodgram.db.backends.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'TEST': {
+            'NAME': os.getenv('SQLITE_TEST_PATH', BASE_DIR / 'test.sqlite3'),
+        },
+    }
+}
+
+# Вторая база для проверки маршрутизации чтения; наполнять её
+# (копированием файла или migrate --database replica) нужно вручную.
+if os.getenv('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        'ENGINE': 'foodgram.db.backends.sqlite3',
+        'NAME': os.getenv('SQLITE_REPLICA_PATH'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+MEDIA_DELIVERY = {
+    **MEDIA_DELIVERY,
+    'ACCEL_REDIRECT': os.getenv('MEDIA_ACCEL_REDIRECT', ''),
+}
+
+PERFORMANCE = {
+    **PERFORMANCE,
+    'SAMPLE_RATE': float(os.getenv('PERFORMANCE_SAMPLE_RATE', 0)),
+}
+
+CACHES = {
+    **CACHES,
+    'responses': {
+        'BACKEND': os.getenv(
+            'RESPONSE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'responses'),
+    },
+    'throttling': {
+        'BACKEND': os.getenv(
+            'THROTTLE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', 'throttling'),
+    },
+}
@@ -1,15 +1,21 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from api.media import serve_media
+from api.metrics import metrics_view
+from api.recipe.views import short_link_redirect
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-    path('api/', include('api.users.urls'))
+    path('api/', include('api.users.urls')),
+    path('s/<str:code>/', short_link_redirect, name='short-link'),
+    path('metrics', metrics_view, name='metrics'),
+    re_path(
+        r'^{}(?P<path>.+)$'.format(settings.MEDIA_URL.lstrip('/')),
+        serve_media,
+        name='media',
+    ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,35 @@
+"""
+Настройки gunicorn для продакшена
+
+Приложение загружается и прогревается в главном процессе до fork,
+поэтому рабочие процессы стартуют с уже импортированными модулями
+и заполненными кэшами, разделяя их страницы памяти с родителем
+(copy-on-write).
+
+API - синхронное приложение WSGI в многопоточных рабочих процессах.
+Поток событий /api/events/ обслуживает отдельный сервис с тем же
+конфигом и GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker для
+приложения foodgram.asgi.
+"""
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault("WARMUP_ON_READY", "True")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:9090")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(
+    os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+)
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 0))
+preload_app = True
+
+
+def when_ready(server):
+    # Объекты, созданные при загрузке, переносятся в постоянное поколение:
+    # сборщик мусора в рабочих процессах не трогает их и не копирует
+    # страницы памяти родителя.
+    gc.freeze()
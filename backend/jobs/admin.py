@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "status", "attempts", "run_at", "created")
+    search_fields = ("name", "idempotency_key")
+    list_filter = ("status", "name")
+    readonly_fields = ("locked_by", "locked_at", "last_error", "finished_at")
+    empty_value_display = "blank"
@@ -0,0 +1,5 @@
+NAME_LENGTH = 100
+KEY_LENGTH = 200
+WORKER_LENGTH = 100
+STATUS_LENGTH = 10
+ERROR_LENGTH = 10000
@@ -0,0 +1,34 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает обработчик фоновых задач. SIGTERM и SIGINT "
+        "останавливают приём задач, начатые задачи дорабатываются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int)
+        parser.add_argument("--poll-interval", type=float)
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Выполнить готовые задачи и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            threads=options["threads"],
+            poll_interval=options["poll_interval"],
+            log=self.stdout.write,
+        )
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(
+            f"Обработчик {worker.name} запущен, потоков: {worker.threads}"
+        )
+        worker.run(once=options["once"])
+        self.stdout.write("Обработчик остановлен")
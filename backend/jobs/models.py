@@ -0,0 +1,61 @@
+from django.db import models
+from django.utils import timezone
+
+from jobs.constants import (
+    KEY_LENGTH,
+    NAME_LENGTH,
+    STATUS_LENGTH,
+    WORKER_LENGTH
+)
+
+
+class Job(models.Model):
+    """
+    Модель фоновой задачи
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField("Задача", max_length=NAME_LENGTH)
+    payload = models.JSONField("Аргументы", default=dict, blank=True)
+    status = models.CharField(
+        "Статус", max_length=STATUS_LENGTH, choices=STATUSES, default=QUEUED
+    )
+    idempotency_key = models.CharField(
+        "Ключ идемпотентности",
+        max_length=KEY_LENGTH,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        "Максимум попыток", default=3
+    )
+    run_at = models.DateTimeField("Запустить после", default=timezone.now)
+    locked_by = models.CharField(
+        "Обработчик", max_length=WORKER_LENGTH, blank=True
+    )
+    locked_at = models.DateTimeField("Взята в работу", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created = models.DateTimeField("Создана", auto_now_add=True)
+    finished_at = models.DateTimeField("Завершена", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            models.Index(fields=["status", "run_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from jobs.models import Job
+
+registry = {}
+
+
+class Handler:
+    def __init__(self, name, function, max_attempts, retry_delay, every):
+        self.name = name
+        self.function = function
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.every = every
+
+
+def job(name, max_attempts=3, retry_delay=10, every=None):
+    """
+    Регистрирует функцию как фоновую задачу
+
+    Аргументы функции должны сериализоваться в JSON. Повторная попытка
+    после ошибки откладывается на retry_delay * 2 ** (попытка - 1) секунд.
+    Задачу с every обработчики сами ставят в очередь без аргументов
+    раз в every секунд.
+    Модули jobs.py приложений импортируются автоматически.
+    """
+
+    def decorator(function):
+        registry[name] = Handler(
+            name, function, max_attempts, retry_delay, every
+        )
+        return function
+
+    return decorator
+
+
+def enqueue(name, payload=None, key=None, delay=0):
+    """
+    Ставит задачу в очередь и возвращает её запись
+
+    Строка пишется в текущей транзакции, поэтому обработчик увидит
+    задачу только после фиксации, а при откате она исчезнет вместе
+    с остальными изменениями. Если задан key и задача с таким ключом
+    уже есть, новая не создаётся.
+    """
+    handler = registry[name]
+    fields = {
+        "name": name,
+        "payload": payload or {},
+        "max_attempts": handler.max_attempts,
+        "run_at": timezone.now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        return Job.objects.create(**fields)
+    instance, _ = Job.objects.get_or_create(
+        idempotency_key=key, defaults=fields
+    )
+    return instance
+
+
+def enqueue_many(name, items):
+    """
+    Ставит в очередь пачку задач одного вида одним запросом
+
+    items - пары (аргументы, ключ идемпотентности или None); задачи
+    с уже существующими ключами пропускаются.
+    """
+    handler = registry[name]
+    now = timezone.now()
+    Job.objects.bulk_create(
+        [
+            Job(
+                name=name,
+                payload=payload,
+                idempotency_key=key,
+                max_attempts=handler.max_attempts,
+                run_at=now,
+            )
+            for payload, key in items
+        ],
+        ignore_conflicts=True,
+    )
@@ -0,0 +1,167 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.constants import ERROR_LENGTH
+from jobs.models import Job
+from jobs.registry import enqueue, registry
+
+
+class Worker:
+    """
+    Обработчик очереди задач на пуле потоков
+
+    Задачи забираются условным UPDATE по статусу, поэтому несколько
+    обработчиков на разных машинах не выполнят одну задачу дважды
+    и не требуют SELECT ... FOR UPDATE. Задачи, зависшие в статусе
+    running дольше JOBS["LOCK_TIMEOUT"] (обработчик был убит), снова
+    ставятся в очередь, так что задача выполняется хотя бы один раз
+    и обработчики должны быть идемпотентны. stop() прекращает приём
+    новых задач и ждёт завершения уже начатых.
+    """
+
+    def __init__(self, threads=None, poll_interval=None, log=None):
+        options = settings.JOBS
+        self.threads = threads or options["THREADS"]
+        self.poll_interval = poll_interval or options["POLL_INTERVAL"]
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.log = log or (lambda message: None)
+        self.stopping = threading.Event()
+        self.maintained_at = None
+        self.scheduled_slots = {}
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self, once=False):
+        """Работает до stop(); с once=True - пока есть готовые задачи."""
+        with ThreadPoolExecutor(
+            self.threads, thread_name_prefix="job"
+        ) as executor:
+            running = set()
+            while not self.stopping.is_set():
+                self.maintain()
+                self.schedule_periodic()
+                running = {future for future in running if not future.done()}
+                jobs = self.claim(self.threads - len(running))
+                for job in jobs:
+                    running.add(executor.submit(self.execute, job))
+                if once and not jobs and not running:
+                    break
+                if not jobs:
+                    self.stopping.wait(self.poll_interval)
+            self.log("Ожидание начатых задач")
+        close_old_connections()
+
+    def claim(self, limit):
+        if limit <= 0:
+            return []
+        now = timezone.now()
+        candidates = (
+            Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+            .order_by("run_at", "id")
+            .values_list("id", flat=True)[:limit * 2]
+        )
+        claimed = []
+        for job_id in candidates:
+            if len(claimed) >= limit:
+                break
+            if self.lock(job_id, now):
+                claimed.append(job_id)
+        return list(Job.objects.filter(id__in=claimed).order_by("run_at"))
+
+    def lock(self, job_id, now):
+        """Забирает задачу, если её ещё не забрал другой обработчик."""
+        return bool(Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=self.name,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        ))
+
+    def execute(self, job):
+        close_old_connections()
+        started = time.monotonic()
+        try:
+            handler = registry.get(job.name)
+            if handler is None:
+                raise LookupError(f"Задача {job.name} не зарегистрирована")
+            handler.function(**job.payload)
+        except Exception:
+            self.fail(job, handler, traceback.format_exc())
+        else:
+            Job.objects.filter(id=job.id, locked_by=self.name).update(
+                status=Job.DONE, finished_at=timezone.now(), last_error=""
+            )
+            self.log(
+                f"{job}: выполнена за {time.monotonic() - started:.2f} с"
+            )
+        finally:
+            close_old_connections()
+
+    def fail(self, job, handler, error):
+        fields = {"last_error": error[-ERROR_LENGTH:], "locked_by": ""}
+        if handler is None or job.attempts >= job.max_attempts:
+            fields.update(status=Job.FAILED, finished_at=timezone.now())
+            self.log(f"{job}: ошибка, попытки исчерпаны\n{error}")
+        else:
+            delay = handler.retry_delay * 2 ** (job.attempts - 1)
+            fields.update(
+                status=Job.QUEUED,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+            self.log(f"{job}: ошибка, повтор через {delay} с\n{error}")
+        Job.objects.filter(id=job.id, locked_by=self.name).update(**fields)
+
+    def schedule_periodic(self):
+        """
+        Ставит периодические задачи в очередь раз в их интервал
+
+        Ключ идемпотентности содержит номер интервала, поэтому
+        несколько обработчиков поставят задачу только один раз.
+        """
+        for handler in registry.values():
+            if handler.every is None:
+                continue
+            slot = int(time.time() // handler.every)
+            if self.scheduled_slots.get(handler.name) != slot:
+                enqueue(handler.name, key=f"{handler.name}:{slot}")
+                self.scheduled_slots[handler.name] = slot
+
+    def maintain(self):
+        """Возвращает зависшие задачи в очередь и чистит старые."""
+        options = settings.JOBS
+        if (
+            self.maintained_at is not None
+            and time.monotonic() - self.maintained_at < options["LOCK_TIMEOUT"]
+        ):
+            return
+        self.maintained_at = time.monotonic()
+        now = timezone.now()
+        stale = Job.objects.filter(
+            status=Job.RUNNING,
+            locked_at__lt=now - timedelta(seconds=options["LOCK_TIMEOUT"]),
+        )
+        stale.filter(attempts__gte=F("max_attempts")).update(
+            status=Job.FAILED, finished_at=now, locked_by=""
+        )
+        requeued = stale.update(status=Job.QUEUED, locked_by="")
+        if requeued:
+            self.log(f"Возвращено в очередь зависших задач: {requeued}")
+        Job.objects.filter(
+            status=Job.DONE,
+            finished_at__lt=now - timedelta(seconds=options["KEEP_DONE"]),
+        ).delete()
+        Job.objects.filter(
+            status=Job.FAILED,
+            finished_at__lt=now - timedelta(seconds=options["KEEP_FAILED"]),
+        ).delete()
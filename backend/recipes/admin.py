@@ -31,6 +31,7 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ("name", "author")
     list_filter = ("name", "author", "tags")
     empty_value_display = "blank"
+    readonly_fields = ("short_link",)
     inlines = [
         RecipeIngredientInline,
     ]
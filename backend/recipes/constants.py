@@ -5,3 +5,18 @@ MIN_COOKING_TIME = 1
 PAGE_SIZE = 100
 MIN_AMOUNT = 1
 PAGES = 5
+SHORT_LINK_ALPHABET = (
+    "0123456789"
+    "abcdefghijklmnopqrstuvwxyz"
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+)
+SHORT_LINK_CACHE_SIZE = 10000
+EVENT_QUEUE_SIZE = 100
+EVENT_KEEPALIVE = 15
+EVENT_POLL_INTERVAL = 1
+EVENT_LOOKBACK = 50
+EVENT_TICKET_TTL = 30
+SIMILAR_LIMIT = 6
+BULK_CREATE_LIMIT = 100
+BULK_BATCH_SIZE = 500
+SMALL_INTEGER_MAX = 32767
@@ -0,0 +1,234 @@
+import itertools
+import json
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tags
+)
+from recipes.trending import recompute_trending
+from user.models import Follow
+from user.stats import reconcile_author_stats
+
+User = get_user_model()
+
+TAGS = (
+    ("Завтрак", "breakfast"),
+    ("Обед", "lunch"),
+    ("Ужин", "dinner"),
+    ("Десерт", "dessert"),
+    ("Выпечка", "baking"),
+    ("Салаты", "salads"),
+    ("Супы", "soups"),
+    ("Напитки", "drinks"),
+)
+PASSWORD = "generated-password"
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def zipf_weights(count, exponent):
+    """Кумулятивные веса распределения Ципфа для count элементов."""
+    return list(itertools.accumulate(
+        1 / (rank ** exponent) for rank in range(1, count + 1)
+    ))
+
+
+class DataGenerator:
+    """
+    Генератор синтетических данных для нагрузочных проверок
+
+    Популярность авторов, ингредиентов и рецептов распределена
+    по закону Ципфа: немногие получают большую часть связей.
+    Все строки пишутся через bulk_create пачками, сигналы и save()
+    не вызываются, поэтому счётчики авторов и популярность рецептов
+    пересчитываются в конце.
+    При одинаковом seed на пустой базе результат одинаков.
+    """
+
+    def __init__(
+        self,
+        users=1000,
+        recipes=10000,
+        follows_per_user=20,
+        ingredients_per_recipe=8,
+        favorites_per_user=50,
+        carts_per_user=5,
+        exponent=1.1,
+        seed=1,
+        batch_size=5000,
+        prefix="gen",
+        log=None,
+    ):
+        self.users = users
+        self.recipes = recipes
+        self.follows_per_user = follows_per_user
+        self.ingredients_per_recipe = ingredients_per_recipe
+        self.favorites_per_user = favorites_per_user
+        self.carts_per_user = carts_per_user
+        self.exponent = exponent
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+
+    def generate(self):
+        ingredient_ids = self.ensure_ingredients()
+        tag_ids = self.ensure_tags()
+        user_ids = self.create_users()
+        self.create_follows(user_ids)
+        recipe_ids = self.create_recipes(user_ids)
+        self.create_recipe_relations(recipe_ids, ingredient_ids, tag_ids)
+        self.create_user_recipe_relations(FavoriteRecipe, user_ids,
+                                          recipe_ids, self.favorites_per_user)
+        self.create_user_recipe_relations(ShoppingCart, user_ids,
+                                          recipe_ids, self.carts_per_user)
+        reconcile_author_stats(self.batch_size)
+        recompute_trending(batch_size=self.batch_size)
+        return user_ids
+
+    def bulk_create(self, model, objects):
+        total = 0
+        for chunk in chunked(objects, self.batch_size):
+            model.objects.bulk_create(
+                chunk, batch_size=self.batch_size, ignore_conflicts=True
+            )
+            total += len(chunk)
+        self.log(f"{model._meta.verbose_name_plural}: {total}")
+        return total
+
+    def ensure_ingredients(self):
+        if not Ingredient.objects.exists():
+            path = settings.BASE_DIR / "data1" / "ingredients.json"
+            with open(path, encoding="utf-8") as file:
+                items = json.load(file)
+            self.bulk_create(
+                Ingredient, (Ingredient(**item) for item in items)
+            )
+        return list(Ingredient.objects.order_by("id").values_list(
+            "id", flat=True
+        ))
+
+    def ensure_tags(self):
+        self.bulk_create(
+            Tags, (Tags(name=name, slug=slug) for name, slug in TAGS)
+        )
+        return list(Tags.objects.order_by("id").values_list("id", flat=True))
+
+    def create_users(self):
+        password = make_password(PASSWORD)
+        prefix = self.prefix
+        self.bulk_create(User, (
+            User(
+                email=f"{prefix}{index}@example.com",
+                username=f"{prefix}{index}",
+                first_name=f"{prefix}-имя-{index}",
+                last_name=f"{prefix}-фамилия-{index}",
+                password=password,
+            )
+            for index in range(self.users)
+        ))
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def sample(self, population, cum_weights, count):
+        """Выборка без повторов с учётом весов популярности."""
+        count = min(count, len(population))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(self.rng.choices(
+                population, cum_weights=cum_weights, k=count - len(chosen)
+            ))
+        return chosen
+
+    def create_follows(self, user_ids):
+        weights = zipf_weights(len(user_ids), self.exponent)
+
+        def follows():
+            for user_id in user_ids:
+                count = self.rng.randint(0, 2 * self.follows_per_user)
+                for author_id in self.sample(user_ids, weights, count):
+                    if author_id != user_id:
+                        yield Follow(user_id=user_id, author_id=author_id)
+
+        self.bulk_create(Follow, follows())
+
+    def create_recipes(self, user_ids):
+        weights = zipf_weights(len(user_ids), self.exponent)
+        authors = self.rng.choices(
+            user_ids, cum_weights=weights, k=self.recipes
+        )
+        start = Recipe.objects.count()
+        self.bulk_create(Recipe, (
+            Recipe(
+                author_id=author_id,
+                name=f"Рецепт {start + index}",
+                image="recipes/images/generated.png",
+                text="Описание рецепта. " * self.rng.randint(3, 30),
+                cooking_time=self.rng.randint(5, 180),
+            )
+            for index, author_id in enumerate(authors)
+        ))
+        return list(
+            Recipe.objects.order_by("id").values_list("id", flat=True)
+        )[start:]
+
+    def create_recipe_relations(self, recipe_ids, ingredient_ids, tag_ids):
+        ingredient_weights = zipf_weights(len(ingredient_ids), self.exponent)
+        tag_weights = zipf_weights(len(tag_ids), 0.8)
+        mean = self.ingredients_per_recipe
+
+        def ingredients():
+            for recipe_id in recipe_ids:
+                count = max(1, round(self.rng.gauss(mean, mean / 3)))
+                for ingredient_id in self.sample(
+                    ingredient_ids, ingredient_weights, count
+                ):
+                    yield RecipeIngredient(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=self.rng.randint(1, 500),
+                    )
+
+        def tags():
+            for recipe_id in recipe_ids:
+                count = self.rng.randint(1, 3)
+                for tag_id in self.sample(tag_ids, tag_weights, count):
+                    yield Recipe.tags.through(
+                        recipe_id=recipe_id, tags_id=tag_id
+                    )
+
+        self.bulk_create(RecipeIngredient, ingredients())
+        self.bulk_create(Recipe.tags.through, tags())
+
+    def create_user_recipe_relations(self, model, user_ids, recipe_ids, mean):
+        weights = zipf_weights(len(recipe_ids), self.exponent)
+        # Порядок популярности не должен совпадать с порядком создания.
+        popular = recipe_ids[:]
+        self.rng.shuffle(popular)
+
+        def rows():
+            for user_id in user_ids:
+                count = self.rng.randint(0, 2 * mean)
+                for recipe_id in self.sample(popular, weights, count):
+                    yield model(user_id=user_id, recipe_id=recipe_id)
+
+        self.bulk_create(model, rows())
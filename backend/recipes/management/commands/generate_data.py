@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.generation import DataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует пользователей, подписки, рецепты, избранное и корзины "
+        "с распределением популярности по закону Ципфа"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--follows-per-user", type=int, default=20)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument("--favorites-per-user", type=int, default=50)
+        parser.add_argument("--carts-per-user", type=int, default=5)
+        parser.add_argument(
+            "--exponent", type=float, default=1.1,
+            help="Показатель степени распределения популярности",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix", default="gen",
+            help="Префикс логинов и почт сгенерированных пользователей",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        generator = DataGenerator(
+            users=options["users"],
+            recipes=options["recipes"],
+            follows_per_user=options["follows_per_user"],
+            ingredients_per_recipe=options["ingredients_per_recipe"],
+            favorites_per_user=options["favorites_per_user"],
+            carts_per_user=options["carts_per_user"],
+            exponent=options["exponent"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            prefix=options["prefix"],
+            log=self.stdout.write,
+        )
+        with transaction.atomic():
+            generator.generate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово за {time.perf_counter() - start:.1f} с"
+        ))
@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import Q
+
+from recipes.utils import encode_base62
+
+
+def fill_short_links(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    recipes = list(
+        Recipe.objects.filter(
+            Q(short_link__isnull=True) | Q(short_link="")
+        ).only("id")
+    )
+    for recipe in recipes:
+        recipe.short_link = encode_base62(recipe.pk)
+    Recipe.objects.bulk_update(recipes, ["short_link"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_short_links, migrations.RunPython.noop),
+    ]
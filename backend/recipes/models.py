@@ -5,6 +5,7 @@ from django.db.models import UniqueConstraint
 
 from recipes.constants import (MIN_AMOUNT, MIN_COOKING_TIME, NAME_LENGTH,
                                SI_LENGTH, SLUG_LENGTH)
+from recipes.utils import encode_base62
 
 User = get_user_model()
 
@@ -96,16 +97,39 @@ class Recipe(models.Model):
         unique=True,
         null=True,
     )
+    trending_score = models.FloatField(
+        "Популярность", default=0, editable=False
+    )
 
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         default_related_name = "recipes"
+        indexes = [
+            models.Index(
+                fields=["-trending_score", "-id"], name="recipe_trending_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.ensure_short_link()
+
+    def ensure_short_link(self):
+        """
+        Заполняет короткую ссылку кодом base62 от id рецепта
+        """
+        if not self.short_link:
+            self.short_link = encode_base62(self.pk)
+            Recipe.objects.filter(pk=self.pk).update(
+                short_link=self.short_link
+            )
+        return self.short_link
+
 
 class RecipeIngredient(models.Model):
     """
@@ -145,6 +169,7 @@ class FavoriteRecipe(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE, verbose_name="Рецепт"
     )
+    created = models.DateTimeField("Добавлен", auto_now_add=True)
 
     class Meta:
         verbose_name = "Избранное"
@@ -172,6 +197,7 @@ class ShoppingCart(models.Model):
     recipe = models.ForeignKey(
         Recipe, verbose_name="Рецепт", on_delete=models.CASCADE
     )
+    created = models.DateTimeField("Добавлен", auto_now_add=True)
 
     class Meta:
         verbose_name = "Корзина покупок"
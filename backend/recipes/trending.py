@@ -0,0 +1,104 @@
+import math
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Exp, Greatest, Least, Ln
+
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+
+ORDERING = ("-trending_score", "-id")
+# Разница логарифмов, ниже которой событие считается последним.
+PRECISION = 1e-9
+# Нижняя граница аргумента exp в базе: PostgreSQL не округляет
+# слишком малые значения до нуля, а падает с ошибкой underflow.
+MIN_EXPONENT = -700.0
+
+
+def event_exponent(created, weight):
+    """
+    Логарифм вклада события в популярность рецепта
+
+    Вклад weight * 2 ** -(возраст / HALF_LIFE) в любой момент времени
+    отличается от weight * exp(λ (created - EPOCH)) общим для всех
+    рецептов множителем, поэтому хранится и сравнивается логарифм
+    суммы последних величин, который со временем не меняется.
+    """
+    options = settings.TRENDING
+    age = (created - options["EPOCH"]).total_seconds()
+    return math.log(weight) + math.log(2) / options["HALF_LIFE"] * age
+
+
+def logaddexp(first, second):
+    top = max(first, second)
+    return top + math.log1p(math.exp(-abs(first - second)))
+
+
+def add_event(recipe_id, created, weight):
+    """Добавляет событие к популярности рецепта одним UPDATE."""
+    exponent = Value(
+        event_exponent(created, weight), output_field=FloatField()
+    )
+    score = F("trending_score")
+    Recipe.objects.filter(pk=recipe_id).update(
+        trending_score=Greatest(score, exponent) + Ln(Value(1.0) + Exp(
+            Greatest(
+                Least(score - exponent, exponent - score),
+                Value(MIN_EXPONENT),
+            )
+        ))
+    )
+
+
+def remove_event(recipe_id, created, weight):
+    """Вычитает вклад удалённого события одним UPDATE."""
+    exponent = event_exponent(created, weight)
+    score = F("trending_score")
+    Recipe.objects.filter(pk=recipe_id).update(trending_score=Case(
+        When(
+            trending_score__gt=exponent + PRECISION,
+            then=score + Ln(Value(1.0) - Exp(Greatest(
+                Value(exponent, output_field=FloatField()) - score,
+                Value(MIN_EXPONENT),
+            ))),
+        ),
+        default=Value(0.0),
+    ))
+
+
+def recompute_trending(recipe_ids=None, batch_size=1000):
+    """
+    Пересчитывает популярность рецептов по избранному и корзинам
+
+    Исправляет накопленную погрешность и изменения в обход сигналов.
+    Без recipe_ids пересчитываются все рецепты. Пустая сумма
+    соответствует нулю: у каждого рецепта есть фиктивное событие
+    веса 1 в момент EPOCH, вклад которого давно ничтожен.
+    Возвращает число изменённых рецептов.
+    """
+    options = settings.TRENDING
+    recipes = Recipe.objects.order_by()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    scores = {}
+    for model, weight in (
+        (FavoriteRecipe, options["FAVORITE_WEIGHT"]),
+        (ShoppingCart, options["CART_WEIGHT"]),
+    ):
+        events = model.objects.order_by()
+        if recipe_ids is not None:
+            events = events.filter(recipe_id__in=recipe_ids)
+        for recipe_id, created in (
+            events.values_list("recipe_id", "created").iterator()
+        ):
+            scores[recipe_id] = logaddexp(
+                scores.get(recipe_id, 0.0), event_exponent(created, weight)
+            )
+    changed = []
+    for recipe_id, current in (
+        recipes.values_list("id", "trending_score").iterator()
+    ):
+        score = scores.get(recipe_id, 0.0)
+        if abs(current - score) > PRECISION:
+            changed.append(Recipe(pk=recipe_id, trending_score=score))
+    Recipe.objects.bulk_update(changed, ["trending_score"], batch_size)
+    return len(changed)
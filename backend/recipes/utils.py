@@ -0,0 +1,31 @@
+from recipes.constants import SHORT_LINK_ALPHABET
+
+
+def encode_base62(number):
+    """
+    Кодирует неотрицательное целое число в строку base62
+    """
+    if number < 0:
+        raise ValueError("Число должно быть неотрицательным")
+    base = len(SHORT_LINK_ALPHABET)
+    digits = []
+    while True:
+        number, remainder = divmod(number, base)
+        digits.append(SHORT_LINK_ALPHABET[remainder])
+        if not number:
+            break
+    return "".join(reversed(digits))
+
+
+def decode_base62(code):
+    """
+    Декодирует строку base62 обратно в целое число
+    """
+    base = len(SHORT_LINK_ALPHABET)
+    number = 0
+    for char in code:
+        index = SHORT_LINK_ALPHABET.find(char)
+        if index < 0:
+            raise ValueError(f"Недопустимый символ: {char}")
+        number = number * base + index
+    return number
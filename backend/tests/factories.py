@@ -0,0 +1,51 @@
+from recipes.models import Ingredient, Recipe, Tags
+from user.models import Users
+
+PASSWORD = "password-12345"
+
+
+def create_user(username, **fields):
+    return Users.objects.create_user(
+        email=f"{username}@example.com",
+        username=username,
+        first_name=fields.pop("first_name", username.title()),
+        last_name=fields.pop("last_name", username.title()),
+        password=PASSWORD,
+        **fields,
+    )
+
+
+def create_tag(slug):
+    return Tags.objects.create(name=slug.title(), slug=slug)
+
+
+def create_ingredient(name, measurement_unit="г"):
+    return Ingredient.objects.create(
+        name=name, measurement_unit=measurement_unit
+    )
+
+
+def create_recipe(author, name="Рецепт", **fields):
+    fields.setdefault("text", "Текст")
+    fields.setdefault("cooking_time", 5)
+    return Recipe.objects.create(author=author, name=name, **fields)
+
+
+IMAGE = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUl"
+    "EQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+
+def recipe_data(name="Рецепт", tags=(), ingredients=(), **fields):
+    return {
+        "name": name,
+        "text": "Текст",
+        "cooking_time": 5,
+        "image": IMAGE,
+        "tags": list(tags),
+        "ingredients": [
+            {"id": ingredient_id, "amount": 2} for ingredient_id in ingredients
+        ],
+        **fields,
+    }
@@ -0,0 +1,51 @@
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import _tokens
+from tests.factories import create_user
+
+ME_URL = "/api/users/me/"
+LOGOUT_URL = "/api/auth/token/logout/"
+
+
+class CachedTokenTests(TestCase):
+    """
+    Кэш токенов в другом процессе
+
+    Запись, оставшаяся в памяти другого рабочего процесса, здесь
+    имитируется возвратом в локальный кэш копии, снятой до изменения.
+    """
+
+    def setUp(self):
+        _tokens.clear()
+        self.user = create_user("user")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def remember_entry(self):
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        return _tokens.get(self.token.key)
+
+    def test_logout_revokes_token_in_other_processes(self):
+        entry = self.remember_entry()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(LOGOUT_URL).status_code, 204)
+        _tokens.set(self.token.key, entry)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_deactivation_revokes_token_in_other_processes(self):
+        entry = self.remember_entry()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        _tokens.set(self.token.key, entry)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_cached_entry_is_reused(self):
+        self.remember_entry()
+        # Один запрос за тегами, пользователь берётся из кэша.
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/tags/")
+        self.assertEqual(response.status_code, 200)
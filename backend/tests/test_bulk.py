@@ -0,0 +1,157 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.generations import RECIPES, get_generations
+from api.recipe.index import recipe_index
+from jobs.models import Job
+from recipes.constants import BULK_CREATE_LIMIT
+from recipes.models import Recipe, RecipeIngredient
+from tests.factories import (
+    create_ingredient,
+    create_tag,
+    create_user,
+    recipe_data
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+BULK_URL = "/api/recipes/bulk/"
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeBulkCreateTests(TestCase):
+    """
+    Массовое создание рецептов
+
+    bulk_create не отправляет сигналы, поэтому последствия создания
+    (счётчики, индекс, поколение кэша, задачи) сравниваются с обычным
+    POST /api/recipes/.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = create_user("author")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.breakfast = create_tag("breakfast")
+        self.dinner = create_tag("dinner")
+        self.salt = create_ingredient("соль")
+        self.sugar = create_ingredient("сахар")
+        recipe_index.build()
+
+    def recipe(self, name, **fields):
+        fields.setdefault("tags", [self.breakfast.pk])
+        fields.setdefault("ingredients", [self.salt.pk, self.sugar.pk])
+        return recipe_data(name, **fields)
+
+    def post(self, url, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, data, format="json")
+
+    def recipes_count(self):
+        self.user.stats.refresh_from_db()
+        return self.user.stats.recipes_count
+
+    def test_errors_per_item(self):
+        response = self.post(BULK_URL, [
+            self.recipe("Первый"),
+            self.recipe("Второй", cooking_time=0),
+            self.recipe("Третий", tags=[self.breakfast.pk, 999]),
+            self.recipe("Четвёртый", ingredients=[self.salt.pk, 999]),
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ["cooking_time"])
+        self.assertEqual(list(errors[2]), ["tags"])
+        self.assertEqual(list(errors[3]), ["ingredients"])
+
+    def test_nothing_written_when_an_item_fails(self):
+        generation = get_generations(RECIPES)
+        response = self.post(BULK_URL, [
+            self.recipe("Первый"), self.recipe("Второй", tags=[999])
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(self.recipes_count(), 0)
+        self.assertEqual(get_generations(RECIPES), generation)
+
+    def test_nothing_written_when_saving_fails(self):
+        generation = get_generations(RECIPES)
+        with mock.patch.object(
+            RecipeIngredient.objects, "bulk_create", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            self.post(BULK_URL, [self.recipe("Первый")])
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(self.recipes_count(), 0)
+        self.assertEqual(get_generations(RECIPES), generation)
+
+    def test_limit(self):
+        response = self.post(BULK_URL, [
+            self.recipe(f"Рецепт {number}")
+            for number in range(BULK_CREATE_LIMIT + 1)
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("non_field_errors", response.json())
+        self.assertFalse(Recipe.objects.exists())
+
+        response = self.post(BULK_URL, [
+            self.recipe(f"Рецепт {number}")
+            for number in range(BULK_CREATE_LIMIT)
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Recipe.objects.count(), BULK_CREATE_LIMIT)
+
+    def assert_created(self, recipe_ids, recipes_count, generation):
+        self.assertEqual(self.recipes_count(), recipes_count)
+        self.assertGreater(get_generations(RECIPES), generation)
+        for recipe in Recipe.objects.filter(pk__in=recipe_ids):
+            self.assertTrue(recipe.short_link)
+            self.assertEqual(
+                recipe_index.recipe_tags[recipe.pk],
+                set(recipe.tags.values_list("id", flat=True)),
+            )
+            self.assertEqual(
+                recipe_index.recipe_ingredients[recipe.pk],
+                set(recipe.ingredients.values_list("id", flat=True)),
+            )
+            self.assertTrue(Job.objects.filter(
+                name="media.optimize_image",
+                idempotency_key=f"optimize:{recipe.image.name}",
+            ).exists())
+
+    def test_same_effects_as_single_create(self):
+        generation = get_generations(RECIPES)
+        response = self.post("/api/recipes/", self.recipe("Обычный"))
+        self.assertEqual(response.status_code, 201)
+        self.assert_created([response.json()["id"]], 1, generation)
+
+        generation = get_generations(RECIPES)
+        response = self.post(BULK_URL, [
+            self.recipe("Первый"),
+            self.recipe(
+                "Второй",
+                tags=[self.breakfast.pk, self.dinner.pk],
+                ingredients=[self.sugar.pk],
+            ),
+        ])
+        self.assertEqual(response.status_code, 201)
+        recipe_ids = [item["id"] for item in response.json()]
+        self.assertEqual(
+            [item["name"] for item in response.json()], ["Первый", "Второй"]
+        )
+        self.assert_created(recipe_ids, 3, generation)
+        self.assertEqual(
+            recipe_index.recipe_tags[recipe_ids[1]],
+            {self.breakfast.pk, self.dinner.pk},
+        )
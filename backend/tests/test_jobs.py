@@ -0,0 +1,162 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import enqueue, enqueue_many, job, registry
+from jobs.worker import Worker
+
+calls = []
+
+
+def make_worker(name):
+    worker = Worker(threads=1, poll_interval=0.01)
+    worker.name = name
+    return worker
+
+
+@mock.patch("jobs.worker.close_old_connections", lambda: None)
+class JobQueueTests(TestCase):
+    """
+    Очередь задач с двумя обработчиками
+
+    Обработчики вызываются по шагам в одном потоке: тестовая
+    транзакция не видна другим соединениям.
+    """
+
+    def setUp(self):
+        patcher = mock.patch.dict(registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        calls.clear()
+
+        @job("test.record")
+        def record(value):
+            calls.append(value)
+
+        @job("test.broken", max_attempts=3, retry_delay=10)
+        def broken():
+            calls.append("broken")
+            raise RuntimeError("сломано")
+
+        self.first = make_worker("first")
+        self.second = make_worker("second")
+
+    def test_job_claimed_once(self):
+        instance = enqueue("test.record", {"value": 1})
+        now = timezone.now()
+        # Оба обработчика увидели задачу в очереди, забирает один.
+        self.assertTrue(self.first.lock(instance.pk, now))
+        self.assertFalse(self.second.lock(instance.pk, now))
+        self.assertEqual(self.second.claim(1), [])
+
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, Job.RUNNING)
+        self.assertEqual(instance.locked_by, "first")
+        self.assertEqual(instance.attempts, 1)
+
+    def test_retries_with_backoff_then_failed(self):
+        instance = enqueue("test.broken")
+        for attempt, delay in ((1, 10), (2, 20)):
+            (claimed,) = self.first.claim(1)
+            started = timezone.now()
+            self.first.execute(claimed)
+            instance.refresh_from_db()
+            self.assertEqual(instance.status, Job.QUEUED)
+            self.assertEqual(instance.attempts, attempt)
+            self.assertAlmostEqual(
+                (instance.run_at - started).total_seconds(), delay, delta=1
+            )
+            self.assertEqual(self.first.claim(1), [])
+            Job.objects.filter(pk=instance.pk).update(run_at=timezone.now())
+
+        (claimed,) = self.first.claim(1)
+        self.first.execute(claimed)
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, Job.FAILED)
+        self.assertEqual(instance.attempts, 3)
+        self.assertIsNotNone(instance.finished_at)
+        self.assertIn("сломано", instance.last_error)
+        self.assertEqual(calls, ["broken"] * 3)
+
+    def test_stale_job_requeued(self):
+        instance = enqueue("test.record", {"value": 1})
+        (claimed,) = self.first.claim(1)
+        Job.objects.filter(pk=instance.pk).update(
+            locked_at=timezone.now() - timedelta(
+                seconds=settings.JOBS["LOCK_TIMEOUT"] + 1
+            )
+        )
+        self.second.maintain()
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, Job.QUEUED)
+        self.assertEqual(instance.locked_by, "")
+
+        (reclaimed,) = self.second.claim(1)
+        # Завершение у прежнего обработчика не трогает чужую задачу.
+        self.first.execute(claimed)
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, Job.RUNNING)
+        self.second.execute(reclaimed)
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, Job.DONE)
+        self.assertEqual(instance.attempts, 2)
+
+    def test_stale_job_without_attempts_failed(self):
+        instance = enqueue("test.record", {"value": 1})
+        Job.objects.filter(pk=instance.pk).update(
+            status=Job.RUNNING,
+            attempts=instance.max_attempts,
+            locked_by="first",
+            locked_at=timezone.now() - timedelta(
+                seconds=settings.JOBS["LOCK_TIMEOUT"] + 1
+            ),
+        )
+        self.second.maintain()
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, Job.FAILED)
+
+    def test_idempotency_key(self):
+        first = enqueue("test.record", {"value": 1}, key="record:1")
+        second = enqueue("test.record", {"value": 2}, key="record:1")
+        self.assertEqual(first.pk, second.pk)
+        enqueue_many("test.record", [
+            ({"value": 3}, "record:1"),
+            ({"value": 4}, "record:2"),
+            ({"value": 5}, "record:2"),
+        ])
+        self.assertEqual(
+            sorted(Job.objects.values_list("idempotency_key", flat=True)),
+            ["record:1", "record:2"],
+        )
+        self.assertEqual(Job.objects.get(pk=first.pk).payload, {"value": 1})
+
+    def test_rolled_back_transaction_leaves_no_job(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            enqueue("test.record", {"value": 1})
+            enqueue_many("test.record", [({"value": 2}, "record:2")])
+            raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+
+    def test_periodic_job_scheduled_once_per_slot(self):
+        @job("test.periodic", every=3600)
+        def periodic():
+            calls.append("periodic")
+
+        with mock.patch("jobs.worker.time.time", return_value=7200.0):
+            self.first.schedule_periodic()
+            self.second.schedule_periodic()
+            self.first.schedule_periodic()
+        self.assertEqual(
+            list(Job.objects.filter(name="test.periodic").values_list(
+                "idempotency_key", flat=True
+            )),
+            ["test.periodic:2"],
+        )
+        with mock.patch("jobs.worker.time.time", return_value=10800.0):
+            self.second.schedule_periodic()
+        self.assertEqual(Job.objects.filter(name="test.periodic").count(), 2)
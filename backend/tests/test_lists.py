@@ -0,0 +1,72 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.signals import delete_list_entry
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+from recipes.trending import event_exponent
+from tests.factories import create_recipe, create_user
+
+
+class ListEntryDeleteTests(TestCase):
+    """
+    Удаление строки избранного или корзины, загруженной дважды
+
+    Так выглядят два одновременных запроса на удаление: оба успели
+    прочитать строку до того, как первый её удалил.
+    """
+
+    def setUp(self):
+        self.author = create_user("author")
+        self.recipe = create_recipe(self.author)
+        self.first = create_user("first")
+        self.second = create_user("second")
+
+    def favorites_count(self):
+        self.author.stats.refresh_from_db()
+        return self.author.stats.favorites_count
+
+    def score(self):
+        return Recipe.objects.get(pk=self.recipe.pk).trending_score
+
+    def delete_twice(self, model):
+        entries = [
+            model.objects.get(user=self.first, recipe=self.recipe)
+            for _ in range(2)
+        ]
+        return [delete_list_entry(entry) for entry in entries]
+
+    def test_favorite_deleted_twice_counts_once(self):
+        FavoriteRecipe.objects.create(user=self.first, recipe=self.recipe)
+        remaining = FavoriteRecipe.objects.create(
+            user=self.second, recipe=self.recipe
+        )
+        self.assertEqual(self.favorites_count(), 2)
+
+        self.assertEqual(self.delete_twice(FavoriteRecipe), [True, False])
+
+        self.assertEqual(self.favorites_count(), 1)
+        self.assertAlmostEqual(
+            self.score(), event_exponent(remaining.created, 1.0)
+        )
+
+    def test_cart_entry_deleted_twice_counts_once(self):
+        ShoppingCart.objects.create(user=self.first, recipe=self.recipe)
+        remaining = ShoppingCart.objects.create(
+            user=self.second, recipe=self.recipe
+        )
+
+        self.assertEqual(self.delete_twice(ShoppingCart), [True, False])
+
+        self.assertAlmostEqual(
+            self.score(), event_exponent(remaining.created, 0.5)
+        )
+
+    def test_api_delete_twice(self):
+        FavoriteRecipe.objects.create(user=self.first, recipe=self.recipe)
+        self.client = APIClient()
+        self.client.force_authenticate(self.first)
+        url = f"/api/recipes/{self.recipe.pk}/favorite/"
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        self.assertEqual(self.favorites_count(), 0)
+        self.assertEqual(self.score(), 0.0)
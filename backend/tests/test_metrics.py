@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+
+class MetricsAccessTests(TestCase):
+    def get(self, **headers):
+        return self.client.get("/metrics", **headers)
+
+    @override_settings(METRICS={**settings.METRICS, "TOKEN": ""})
+    def test_disabled_without_token(self):
+        self.assertEqual(self.get().status_code, 404)
+
+    @override_settings(METRICS={**settings.METRICS, "TOKEN": "secret"})
+    def test_requires_token(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(
+            self.get(HTTP_AUTHORIZATION="Bearer wrong").status_code, 403
+        )
+        response = self.get(HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"foodgram_", response.content)
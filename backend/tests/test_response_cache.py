@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.generations import get_cache
+from recipes.models import Recipe, RecipeIngredient
+from tests.factories import (
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user
+)
+
+RECIPES_URL = "/api/recipes/"
+TAGS_URL = "/api/tags/"
+INGREDIENTS_URL = "/api/ingredients/"
+
+
+class ResponseCacheTests(TestCase):
+    """
+    Сброс кэша ответов анонимным пользователям после записи
+
+    Поколения сдвигаются в transaction.on_commit: колбэки выполняются
+    только внутри captureOnCommitCallbacks(execute=True), что и
+    означает фиксацию.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = create_user("author")
+        self.tag = create_tag("breakfast")
+        self.ingredient = create_ingredient("соль")
+        self.recipe = create_recipe(self.author)
+        self.anonymous = APIClient()
+
+    def cache_status(self, url):
+        response = self.anonymous.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.get("X-Cache")
+
+    def assert_cached(self, url):
+        self.cache_status(url)
+        self.assertEqual(self.cache_status(url), "HIT")
+
+    def assert_invalidated_on_commit(self, url, write):
+        self.assert_cached(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            write()
+        # До фиксации кэш не сбрасывается.
+        self.assertEqual(self.cache_status(url), "HIT")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.cache_status(url), "MISS")
+        self.assertEqual(self.cache_status(url), "HIT")
+
+    def assert_kept_on_rollback(self, url, write):
+        self.assert_cached(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                write()
+                raise RuntimeError
+        self.assertEqual(self.cache_status(url), "HIT")
+
+    def test_recipe(self):
+        self.assert_invalidated_on_commit(
+            RECIPES_URL, lambda: create_recipe(self.author, "Второй")
+        )
+        self.assert_invalidated_on_commit(
+            f"{RECIPES_URL}{self.recipe.pk}/", self.recipe.save
+        )
+        self.assert_kept_on_rollback(
+            RECIPES_URL, lambda: create_recipe(self.author, "Третий")
+        )
+
+    def test_recipe_ingredient(self):
+        def add_ingredient():
+            RecipeIngredient.objects.create(
+                recipe=self.recipe, ingredient=self.ingredient, amount=1
+            )
+
+        self.assert_kept_on_rollback(RECIPES_URL, add_ingredient)
+        self.assert_invalidated_on_commit(RECIPES_URL, add_ingredient)
+
+    def test_tag_links(self):
+        self.assert_kept_on_rollback(
+            RECIPES_URL, lambda: self.recipe.tags.add(self.tag)
+        )
+        self.assert_invalidated_on_commit(
+            RECIPES_URL, lambda: self.recipe.tags.add(self.tag)
+        )
+        self.assert_invalidated_on_commit(
+            RECIPES_URL, lambda: self.tag.recipes.remove(self.recipe)
+        )
+
+    def test_tags(self):
+        for url in (TAGS_URL, f"{TAGS_URL}{self.tag.pk}/", RECIPES_URL):
+            self.assert_kept_on_rollback(url, lambda: create_tag("dinner"))
+            self.assert_invalidated_on_commit(url, self.tag.save)
+
+    def test_ingredients(self):
+        for url in (INGREDIENTS_URL, RECIPES_URL):
+            self.assert_kept_on_rollback(
+                url, lambda: create_ingredient("перец")
+            )
+            self.assert_invalidated_on_commit(url, self.ingredient.save)
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.assert_cached(RECIPES_URL)
+        # Запись в обход сигналов не сдвигает поколение.
+        Recipe.objects.filter(pk=self.recipe.pk).update(name="Новое имя")
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.get(RECIPES_URL)
+        self.assertIsNone(response.get("X-Cache"))
+        self.assertEqual(response.json()["results"][0]["name"], "Новое имя")
+        self.assertEqual(self.cache_status(RECIPES_URL), "HIT")
+        self.assertNotEqual(
+            self.anonymous.get(RECIPES_URL).json()["results"][0]["name"],
+            "Новое имя",
+        )
@@ -0,0 +1,45 @@
+from django.test import TestCase
+
+from api.generations import get_cache
+from api.recipe.shortlinks import _short_links
+from recipes.models import Recipe
+from recipes.utils import encode_base62
+from tests.factories import create_recipe, create_user
+
+
+class ShortLinkRedirectTests(TestCase):
+    def setUp(self):
+        _short_links.clear()
+        get_cache().clear()
+        self.recipe = create_recipe(create_user("author"))
+        self.code = encode_base62(self.recipe.pk)
+
+    def assert_redirects_to_recipe(self, code):
+        response = self.client.get(f"/s/{code}/")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Location"], f"/recipes/{self.recipe.pk}/")
+
+    def assert_not_found(self, code):
+        self.assertEqual(self.client.get(f"/s/{code}/").status_code, 404)
+
+    def test_stored_link(self):
+        self.assertEqual(self.recipe.short_link, self.code)
+        self.assert_redirects_to_recipe(self.code)
+
+    def test_link_not_stored_yet(self):
+        for value in (None, ""):
+            _short_links.clear()
+            get_cache().clear()
+            Recipe.objects.filter(pk=self.recipe.pk).update(short_link=value)
+            self.assert_redirects_to_recipe(self.code)
+
+    def test_decoded_id_with_other_link(self):
+        Recipe.objects.filter(pk=self.recipe.pk).update(short_link="other")
+        self.assert_not_found(self.code)
+        self.assert_redirects_to_recipe("other")
+
+    def test_invalid_codes(self):
+        self.assert_not_found(f"0{self.code}")
+        self.assert_not_found("не-код")
+        self.assert_not_found("Z" * 20)
+        self.assert_not_found(encode_base62(self.recipe.pk + 1))
@@ -0,0 +1,82 @@
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from api.throttling import UserBucketThrottle
+from user.models import Users
+
+THREADS = 20
+
+
+@override_settings(THROTTLING={
+    **settings.THROTTLING,
+    "RATES": {"user": "5/min"},
+    "BUCKET_LOCK_WAIT": 5,
+})
+class TokenBucketRaceTests(SimpleTestCase):
+    """
+    Параллельные запросы одного пользователя к одному ведру
+
+    Чтение ведра замедлено, чтобы все потоки успели прочитать его
+    до первой записи, если обновление не защищено блокировкой.
+    """
+
+    def setUp(self):
+        self.cache = caches[settings.THROTTLING["ALIAS"]]
+        self.cache.clear()
+
+    def make_request(self):
+        request = APIRequestFactory().get("/api/recipes/")
+        force_authenticate(request, Users(pk=1))
+        return Request(request, authenticators=None)
+
+    def test_parallel_requests_spend_capacity_once(self):
+        get = LocMemCache.get
+
+        def slow_get(cache, *args, **kwargs):
+            value = get(cache, *args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        barrier = threading.Barrier(THREADS)
+        allowed = []
+
+        def send():
+            request = self.make_request()
+            barrier.wait()
+            if UserBucketThrottle().allow_request(request, APIView()):
+                allowed.append(True)
+
+        threads = [threading.Thread(target=send) for _ in range(THREADS)]
+        # caches[...] у каждого потока свой, хранилище LocMemCache общее.
+        with mock.patch.object(LocMemCache, "get", slow_get):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(allowed), 5)
+
+    @override_settings(THROTTLING={
+        **settings.THROTTLING,
+        "RATES": {"user": "5/min"},
+        "BUCKET_LOCK_WAIT": 0.01,
+    })
+    def test_request_denied_while_bucket_locked(self):
+        self.cache.add("lock:throttle:user:1", "other", 1)
+        throttle = UserBucketThrottle()
+        self.assertFalse(
+            throttle.allow_request(self.make_request(), APIView())
+        )
+        self.assertEqual(throttle.wait(), 0.01)
+        self.cache.delete("lock:throttle:user:1")
+        self.assertTrue(
+            UserBucketThrottle().allow_request(self.make_request(), APIView())
+        )
@@ -0,0 +1,69 @@
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from recipes.models import Recipe
+from recipes.trending import add_event, event_exponent, remove_event
+from user.models import Users
+
+EPOCH = settings.TRENDING["EPOCH"]
+
+
+def postgres_exp(value):
+    """exp как в PostgreSQL: ошибка вместо округления к нулю."""
+    if value is None:
+        return None
+    if value < -745:
+        raise OverflowError("value out of range: underflow")
+    return math.exp(value)
+
+
+@override_settings(TRENDING={**settings.TRENDING, "HALF_LIFE": 1.0})
+class TrendingUnderflowTests(TestCase):
+    """
+    Популярность с коротким периодом полураспада
+
+    За час вклад события меняется в 2 ** 3600 раз, поэтому разница
+    логарифмов выходит далеко за пределы, которые выдерживает exp.
+    """
+
+    def setUp(self):
+        connection.ensure_connection()
+        connection.connection.create_function("EXP", 1, postgres_exp)
+        author = Users.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Автор",
+            last_name="Авторов",
+            password="password-12345",
+        )
+        self.recipe = Recipe.objects.create(
+            author=author, name="Рецепт", text="Текст", cooking_time=5
+        )
+
+    def score(self):
+        return Recipe.objects.get(pk=self.recipe.pk).trending_score
+
+    def test_add_event_far_from_current_score(self):
+        old = EPOCH + timedelta(hours=1)
+        new = EPOCH + timedelta(hours=2)
+        add_event(self.recipe.pk, old, 1.0)
+        self.assertAlmostEqual(self.score(), event_exponent(old, 1.0))
+        add_event(self.recipe.pk, new, 1.0)
+        self.assertAlmostEqual(self.score(), event_exponent(new, 1.0))
+        # Событие из прошлого ничтожно мало по сравнению с текущим счётом.
+        add_event(self.recipe.pk, old, 1.0)
+        self.assertAlmostEqual(self.score(), event_exponent(new, 1.0))
+
+    def test_remove_event_far_below_current_score(self):
+        old = EPOCH + timedelta(hours=1)
+        new = EPOCH + timedelta(hours=2)
+        add_event(self.recipe.pk, old, 1.0)
+        add_event(self.recipe.pk, new, 1.0)
+        remove_event(self.recipe.pk, old, 1.0)
+        self.assertAlmostEqual(self.score(), event_exponent(new, 1.0))
+        remove_event(self.recipe.pk, new, 1.0)
+        self.assertEqual(self.score(), 0.0)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from user.models import Follow, Users
+from user.models import AuthorStats, Follow, Users
 
 
 class UserAdmin(BaseUserAdmin):
@@ -17,9 +17,21 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "recipes_count",
+        "followers_count",
+        "favorites_count",
+    )
+    readonly_fields = list_display
+    list_select_related = ("user",)
+
+
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ("user", "author")
 
 
 admin.site.register(Users, UserAdmin)
 admin.site.register(Follow, SubscriptionAdmin)
+admin.site.register(AuthorStats, AuthorStatsAdmin)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from user.stats import reconcile_author_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счётчики авторов (рецепты, подписчики, избранное) "
+        "и исправляет разошедшиеся"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = reconcile_author_stats(options["batch_size"])
+        self.stdout.write(f"Исправлено записей: {fixed}")
@@ -0,0 +1,59 @@
+# Generated by Django 3.2 on 2026-10-19 10:51
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def counts(queryset, field):
+    return dict(
+        queryset.order_by().values_list(field).annotate(count=Count("*"))
+    )
+
+
+def fill_author_stats(apps, schema_editor):
+    Users = apps.get_model("user", "Users")
+    Follow = apps.get_model("user", "Follow")
+    Recipe = apps.get_model("recipes", "Recipe")
+    FavoriteRecipe = apps.get_model("recipes", "FavoriteRecipe")
+    AuthorStats = apps.get_model("user", "AuthorStats")
+    recipes = counts(Recipe.objects, "author")
+    followers = counts(Follow.objects, "author")
+    favorites = counts(FavoriteRecipe.objects, "recipe__author")
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(
+                user_id=user_id,
+                recipes_count=recipes.get(user_id, 0),
+                followers_count=followers.get(user_id, 0),
+                favorites_count=favorites.get(user_id, 0),
+            )
+            for user_id in Users.objects.values_list("id", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_auto_20250228_0944'),
+        ('recipes', '0002_fill_short_links'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='user.users', verbose_name='Пользователь')),
+                ('recipes_count', models.IntegerField(default=0, verbose_name='Рецептов')),
+                ('followers_count', models.IntegerField(default=0, verbose_name='Подписчиков')),
+                ('favorites_count', models.IntegerField(default=0, verbose_name='Добавлений в избранное')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
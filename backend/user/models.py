@@ -81,3 +81,27 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"{self.user} подписан на {self.author}"
+
+
+class AuthorStats(models.Model):
+    """
+    Счётчики автора, которые поддерживаются при записи
+    """
+
+    user = models.OneToOneField(
+        Users,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Пользователь",
+    )
+    recipes_count = models.IntegerField("Рецептов", default=0)
+    followers_count = models.IntegerField("Подписчиков", default=0)
+    favorites_count = models.IntegerField("Добавлений в избранное", default=0)
+
+    class Meta:
+        verbose_name = "Статистика автора"
+        verbose_name_plural = "Статистика авторов"
+
+    def __str__(self):
+        return f"Статистика {self.user}"
@@ -0,0 +1,86 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import FavoriteRecipe, Recipe
+from user.models import AuthorStats, Follow, Users
+
+STATS_FIELDS = ("recipes_count", "followers_count", "favorites_count")
+
+
+def change_stats(author, **deltas):
+    """
+    Сдвигает счётчики автора одним UPDATE в текущей транзакции
+
+    author - id автора или выражение, которое его вычисляет.
+    Вычисление идёт в базе через F(), поэтому параллельные изменения
+    не теряются.
+    """
+    AuthorStats.objects.filter(user_id=author).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def author_of_recipe(recipe_id):
+    return Subquery(
+        Recipe.objects.filter(pk=recipe_id).values("author_id")[:1]
+    )
+
+
+def count_by_author(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("user_id")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def reconcile_author_stats(batch_size=1000):
+    """
+    Пересчитывает счётчики всех авторов по исходным таблицам
+
+    Создаёт недостающие строки и исправляет только разошедшиеся,
+    возвращает число исправленных строк.
+    """
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(user_id=user_id)
+            for user_id in Users.objects.filter(stats__isnull=True)
+            .values_list("id", flat=True)
+        ],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    drifted = (
+        AuthorStats.objects.annotate(
+            actual_recipes=count_by_author(Recipe.objects, "author"),
+            actual_followers=count_by_author(Follow.objects, "author"),
+            actual_favorites=count_by_author(
+                FavoriteRecipe.objects, "recipe__author"
+            ),
+        )
+        .exclude(
+            recipes_count=F("actual_recipes"),
+            followers_count=F("actual_followers"),
+            favorites_count=F("actual_favorites"),
+        )
+        .order_by()
+    )
+    fixed = [
+        AuthorStats(
+            user_id=row["user_id"],
+            recipes_count=row["actual_recipes"],
+            followers_count=row["actual_followers"],
+            favorites_count=row["actual_favorites"],
+        )
+        for row in drifted.values(
+            "user_id", "actual_recipes", "actual_followers",
+            "actual_favorites",
+        )
+    ]
+    AuthorStats.objects.bulk_update(fixed, STATS_FIELDS, batch_size)
+    return len(fixed)